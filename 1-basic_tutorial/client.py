@@ -4,11 +4,18 @@ Simple MCP client to interact with the SimpleServer.
 import asyncio
 import json
 import sys
-from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
+from contextlib import AsyncExitStack
+from llama_index.tools.mcp import McpToolSpec
+from mcp import ClientSession
+from mcp.client.sse import sse_client
 
 # MCP server configuration
 MCP_URL = "http://localhost:8000/sse"
 
+# One session for the whole run; opened on first use
+_stack = None
+_session = None
+
 def check_requirements():
     """Check if all required packages are installed."""
     try:
@@ -19,12 +26,37 @@ def check_requirements():
         print("Install with: pip install llama-index llama-index-tools-mcp")
         return False
 
+async def get_session():
+    """Return the shared MCP session, connecting (or reconnecting after an error) if needed."""
+    global _stack, _session
+    if _session is None:
+        print(f"Connecting to MCP server at {MCP_URL}...")
+        stack = AsyncExitStack()
+        try:
+            streams = await stack.enter_async_context(sse_client(MCP_URL))
+            session = await stack.enter_async_context(ClientSession(*streams))
+            await asyncio.wait_for(session.initialize(), timeout=10)
+        except BaseException:
+            await stack.aclose()
+            raise
+        _stack, _session = stack, session
+    return _session
+
+async def close_session():
+    """Close the shared session; the next call opens a new one."""
+    global _stack, _session
+    stack, _stack, _session = _stack, None, None
+    if stack is not None:
+        try:
+            await stack.aclose()
+        except Exception:
+            pass
+
 async def call_hello_world(name=None):
     """Call the hello_world tool."""
     try:
-        # Create client
-        client = BasicMCPClient(MCP_URL)
-        print(f"Connecting to MCP server at {MCP_URL}...")
+        # Reuse the shared session
+        client = await get_session()
         
         # Set up parameters
         args = {"name": name} if name else {}
@@ -53,14 +85,14 @@ async def call_hello_world(name=None):
         
     except Exception as e:
         print(f"Error calling hello_world: {e}")
+        await close_session()
         return None
 
 async def call_add(a, b):
     """Call the add tool."""
     try:
-        # Create client
-        client = BasicMCPClient(MCP_URL)
-        print(f"Connecting to MCP server at {MCP_URL}...")
+        # Reuse the shared session
+        client = await get_session()
         
         # Call the tool
         print(f"Calling add tool with a={a}, b={b}...")
@@ -85,14 +117,14 @@ async def call_add(a, b):
         
     except Exception as e:
         print(f"Error calling add: {e}")
+        await close_session()
         return None
 
 async def list_tools():
     """List all available tools on the server."""
     try:
-        # Create client
-        client = BasicMCPClient(MCP_URL)
-        print(f"Connecting to MCP server at {MCP_URL}...")
+        # Reuse the shared session
+        client = await get_session()
         
         # Get available tools
         tools_spec = McpToolSpec(client=client)
@@ -109,6 +141,7 @@ async def list_tools():
         
     except Exception as e:
         print(f"Error listing tools: {e}")
+        await close_session()
         return []
 
 async def interactive_mode():
@@ -190,10 +223,17 @@ async def main():
         print(f"Unknown command: {command}")
         print("Available commands: hello, add, tools")
 
+async def run():
+    """Run main() and close the shared MCP session afterwards."""
+    try:
+        await main()
+    finally:
+        await close_session()
+
 if __name__ == "__main__":
     # Check requirements first
     if not check_requirements():
         sys.exit(1)
     
     # Run the client
-    asyncio.run(main()) 
\ No newline at end of file
+    asyncio.run(run()) 
\ No newline at end of file
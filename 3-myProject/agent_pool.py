@@ -0,0 +1,105 @@
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List
+
+DEFAULT_AGENT_POOL_SIZE = 2
+DEFAULT_MAX_WAITING = 16
+DEFAULT_SESSION_HISTORY = 10   # mesaj
+DEFAULT_MAX_SESSIONS = 1000
+
+
+class PoolBusyError(Exception):
+    """Raised when too many requests are already waiting for an agent"""
+
+
+class AgentPool:
+    """Bounded set of agent instances built from one shared MCP client and LLM client
+
+    A request borrows an agent for its whole run, so two requests never share
+    workflow state. Requests beyond `size` wait in a FIFO queue; beyond
+    `max_waiting` they are rejected instead of piling up.
+    """
+
+    def __init__(self, factory: Callable[[], Any], size: int = DEFAULT_AGENT_POOL_SIZE,
+                 max_waiting: int = DEFAULT_MAX_WAITING):
+        self.size = size
+        self.max_waiting = max_waiting
+        self._idle = asyncio.Queue()
+        for _ in range(size):
+            self._idle.put_nowait(factory())
+        self._waiting = 0
+        self._in_use = 0
+        self._stats = {"served": 0, "rejected": 0, "queued": 0, "wait_time": 0.0, "max_wait": 0.0, "run_time": 0.0}
+
+    @asynccontextmanager
+    async def acquire(self):
+        if self._idle.empty():
+            if self._waiting >= self.max_waiting:
+                self._stats["rejected"] += 1
+                raise PoolBusyError(f"Server busy: {self._waiting} requests already waiting for an agent")
+            self._stats["queued"] += 1
+
+        self._waiting += 1
+        start = time.perf_counter()
+        try:
+            agent = await self._idle.get()
+        finally:
+            self._waiting -= 1
+        waited = time.perf_counter() - start
+        self._stats["wait_time"] += waited
+        self._stats["max_wait"] = max(self._stats["max_wait"], waited)
+
+        self._in_use += 1
+        run_start = time.perf_counter()
+        try:
+            yield agent
+        finally:
+            self._stats["run_time"] += time.perf_counter() - run_start
+            self._stats["served"] += 1
+            self._in_use -= 1
+            self._idle.put_nowait(agent)
+
+    def stats(self) -> Dict[str, Any]:
+        s = self._stats
+        served = s["served"] or 1
+        return {
+            "size": self.size,
+            "in_use": self._in_use,
+            "waiting": self._waiting,
+            "max_waiting": self.max_waiting,
+            "served": s["served"],
+            "queued": s["queued"],
+            "rejected": s["rejected"],
+            "avg_wait_ms": round(s["wait_time"] / served * 1000, 2),
+            "max_wait_ms": round(s["max_wait"] * 1000, 2),
+            "avg_run_ms": round(s["run_time"] / served * 1000, 2),
+        }
+
+
+class SessionStore:
+    """Per-session chat history (last N messages), LRU-bounded by session count"""
+
+    def __init__(self, max_messages: int = DEFAULT_SESSION_HISTORY, max_sessions: int = DEFAULT_MAX_SESSIONS):
+        self.max_messages = max_messages
+        self.max_sessions = max_sessions
+        self._sessions = OrderedDict()
+
+    def history(self, session_id: str) -> List[Any]:
+        messages = self._sessions.get(session_id)
+        if messages is None:
+            return []
+        self._sessions.move_to_end(session_id)
+        return list(messages)
+
+    def append(self, session_id: str, *messages):
+        history = self._sessions.setdefault(session_id, [])
+        history.extend(messages)
+        del history[:-self.max_messages]
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    def __len__(self):
+        return len(self._sessions)
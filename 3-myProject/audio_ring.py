@@ -0,0 +1,160 @@
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict
+
+import numpy as np
+
+DROP_OLDEST = "drop_oldest"   # geride kalınca en eski sesi at: gecikme max_lag'i geçmez
+DROP_NEWEST = "drop_newest"   # gelen yeni sesi at: cümlenin başı korunur
+POLICIES = (DROP_OLDEST, DROP_NEWEST)
+DEFAULT_MAX_LAG = 2.0  # saniye: tampon kapasitesi ve tanıyıcının gerisinde kalabileceği en fazla süre
+
+
+class AudioRingBuffer:
+    """Fixed-size int16 ring between the audio callback (producer) and the recognizer thread (consumer)
+
+    The whole buffer is allocated once, so memory stays flat however far the
+    recognizer falls behind. More than `max_lag` seconds of unread audio is an
+    overrun: the policy drops either the oldest unread audio or the incoming
+    block, and the drop is counted. read() lends the consumer a memoryview of the
+    buffered samples without copying. The producer never overwrites a region that
+    is still lent out; blocks arriving meanwhile go to the spare half of the
+    buffer, and with drop_oldest the next read() trims the backlog to max_lag.
+    """
+
+    def __init__(self, samplerate: int = 16000, max_lag: float = DEFAULT_MAX_LAG, policy: str = DROP_OLDEST,
+                 blocksize: int = None):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown overrun policy '{policy}', expected one of {', '.join(POLICIES)}")
+        self.samplerate = samplerate
+        self.policy = policy
+        self.capacity = max(1, int(samplerate * max_lag))
+        if blocksize is not None and self.capacity < blocksize:
+            # Tüketicinin beklediği blok hiç birikemez: her okuma zaman aşımına kadar bekler
+            raise ValueError(f"max_lag {max_lag}s holds {self.capacity} samples, "
+                             f"less than one block of {blocksize}; use at least {blocksize / samplerate:g}s")
+        # Fiziksel tampon iki katı: tüketici bir bloğu işlerken gelen ses için yer
+        self._size = 2 * self.capacity
+        self._buf = np.zeros(self._size, dtype=np.int16)
+        self._view = memoryview(self._buf)
+        # Mutlak örnek sayaçları; halkadaki konum = sayaç % _size
+        self._written = 0
+        self._read = 0
+        self._held = 0     # tüketiciye ödünç verilmiş örnekler (_read'den başlayarak)
+        self._last_write_time = None
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stats = {"writes": 0, "written": 0, "reads": 0, "overruns": 0, "dropped_oldest": 0,
+                       "dropped_newest": 0, "lag_sum": 0.0, "max_lag": 0.0}
+
+    def _used(self) -> int:
+        return self._written - self._read
+
+    def write(self, data) -> int:
+        """Copy one block (anything exposing int16 samples) into the ring; returns the samples kept"""
+        samples = np.frombuffer(data, dtype=np.int16)
+        n = samples.size
+        with self._cond:
+            if self._closed:
+                return 0
+            self._stats["writes"] += 1
+            tail_dropped = 0
+            if self.policy == DROP_OLDEST:
+                if n > self.capacity:
+                    # Tek blok bile sınırdan büyük: bloğun başı atılır
+                    self._stats["overruns"] += 1
+                    self._stats["dropped_oldest"] += n - self.capacity
+                    samples = samples[n - self.capacity:]
+                    n = self.capacity
+                if not self._held and self._used() + n > self.capacity:
+                    # En eski okunmamış ses atlanır
+                    self._drop_oldest(self._used() + n - self.capacity)
+                # Ödünç bölge varken yedek yarıya yazılır; o da dolarsa yenisi atılır
+                free = self._size - self._used()
+            else:
+                free = self.capacity - self._used()
+            if n > free:
+                tail_dropped = n - free
+                self._stats["overruns"] += 1
+                self._stats["dropped_newest"] += tail_dropped
+                samples = samples[:free]
+                n = free
+            if n:
+                start = self._written % self._size
+                first = min(n, self._size - start)
+                self._buf[start:start + first] = samples[:first]
+                self._buf[:n - first] = samples[first:]
+                self._written += n
+                self._stats["written"] += n
+                # Son örneğin kaydedildiği an (atılan kuyruk daha sonra kaydedilmişti)
+                self._last_write_time = time.monotonic() - tail_dropped / self.samplerate
+                self._cond.notify()
+            return n
+
+    def _drop_oldest(self, samples: int):
+        self._read += samples
+        self._stats["overruns"] += 1
+        self._stats["dropped_oldest"] += samples
+
+    @contextmanager
+    def read(self, max_samples: int, timeout: float = None, min_samples: int = None):
+        """Lend up to max_samples buffered samples as (memoryview of bytes, capture time of its last sample)
+
+        Waits until min_samples (default max_samples) are buffered, the timeout
+        passes or the ring is closed; the view may then be shorter or empty. It is
+        only valid inside the with block: the samples are released on exit.
+        """
+        wanted = max_samples if min_samples is None else min_samples
+        with self._cond:
+            self._cond.wait_for(lambda: self._used() >= wanted or self._closed, timeout)
+            if self.policy == DROP_OLDEST and self._used() > self.capacity:
+                # Önceki blok işlenirken biriken fazlalık: gecikme max_lag'e indirilir
+                self._drop_oldest(self._used() - self.capacity)
+            available = self._used()
+            lag = available / self.samplerate
+            self._stats["reads"] += 1
+            self._stats["lag_sum"] += lag
+            self._stats["max_lag"] = max(self._stats["max_lag"], lag)
+            start = self._read % self._size
+            # Sadece bitişik kısım: halkanın sonuna gelindiyse kalanı bir sonraki okumada
+            n = min(available, max_samples, self._size - start)
+            self._held = n
+            end = self._read + n
+            captured_at = (self._last_write_time - (self._written - end) / self.samplerate
+                           if self._last_write_time is not None else time.monotonic())
+        try:
+            yield self._view[start:start + n].cast("B"), captured_at
+        finally:
+            with self._cond:
+                self._read += self._held
+                self._held = 0
+
+    def lag(self) -> float:
+        """Seconds of audio waiting for the consumer"""
+        with self._cond:
+            return self._used() / self.samplerate
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            s = dict(self._stats)
+            lag = self._used() / self.samplerate
+        reads = s.pop("reads")
+        lag_sum = s.pop("lag_sum")
+        max_lag = s.pop("max_lag")
+        return {
+            **s,
+            "policy": self.policy,
+            "capacity_s": round(self.capacity / self.samplerate, 3),
+            "buffer_bytes": self._buf.nbytes,
+            "reads": reads,
+            "lag_s": round(lag, 3),
+            "avg_lag_s": round(lag_sum / reads, 3) if reads else None,
+            "max_lag_s": round(max_lag, 3),
+            "dropped_s": round((s["dropped_oldest"] + s["dropped_newest"]) / self.samplerate, 3),
+        }
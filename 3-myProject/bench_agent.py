@@ -0,0 +1,148 @@
+"""
+End-to-end latency benchmark for the kitchen agent that runs fully offline.
+
+Starts three servers in this process, each on its own thread and event loop:
+  - mock_ollama.py: a scripted LLM with configurable load, prefill and per-token latency
+  - server.py: the FastMCP app on a generated db of --rows materials
+  - client.py: the FastAPI app under test (agent pool, prompt builder, caches)
+Then it drives POST /query with --users concurrent users. For each level it
+reports throughput, p50/p95/p99 latency, time per tool call and time per LLM
+call. All three servers share one interpreter, so compare runs with each other
+to catch regressions rather than reading the numbers as production latency.
+
+    python bench_agent.py --rows 100000 --users 1 4 8 --requests 40 --token_ms 15
+"""
+import argparse
+import asyncio
+import os
+import shutil
+import tempfile
+import time
+
+import httpx
+
+from bench_common import make_synthetic_db, percentile, ms, free_port, serve_in_thread
+from db_pool import close_pools
+
+# Okuma ağırlıklı karışım; mock LLM her biri için tek araç çağırıp cevaplar
+QUERIES = [
+    "which items are out of stock in the materials table?",
+    "show the materials table",
+    "stokta olan ürünler neler?",
+    "list the tables",
+    "how many items are out of stock?",
+    "materials tablosunu göster",
+]
+
+
+async def _user(http: httpx.AsyncClient, url: str, requests: int, offset: int, results: list):
+    for i in range(requests):
+        query = QUERIES[(offset + i) % len(QUERIES)]
+        start = time.perf_counter()
+        try:
+            r = await http.post(url, json={"query": query})
+            ok = r.status_code == 200 and "error" not in r.json()
+        except httpx.HTTPError:
+            ok = False
+        results.append((time.perf_counter() - start, ok))
+
+
+async def run_level(url: str, users: int, requests: int):
+    results = []
+    per_user = max(1, requests // users)
+    async with httpx.AsyncClient(timeout=300) as http:
+        start = time.perf_counter()
+        await asyncio.gather(*(_user(http, url, per_user, u, results) for u in range(users)))
+        wall = time.perf_counter() - start
+    latencies = [t for t, ok in results if ok]
+    return {
+        "users": users,
+        "requests": len(results),
+        "errors": sum(1 for _, ok in results if not ok),
+        "throughput": len(results) / wall,
+        "p50": percentile(latencies, 50),
+        "p95": percentile(latencies, 95),
+        "p99": percentile(latencies, 99),
+    }
+
+
+def print_calls(title: str, stats: dict, requests: int):
+    if not stats:
+        return
+    print(f"  {title:<18} {'calls':>6} {'/req':>5} {'avg':>11} {'p50':>11} {'p95':>11} {'errors':>6}")
+    for name, s in sorted(stats.items()):
+        print(f"  {name:<18} {s['calls']:>6} {s['calls'] / max(requests, 1):>5.1f} {s['avg_ms']:>8.2f} ms "
+              f"{s['p50_ms']:>8.2f} ms {s['p95_ms']:>8.2f} ms {s['errors']:>6}")
+
+
+def main(args):
+    tmp = tempfile.mkdtemp(prefix="bench_agent_")
+    db_path = os.path.join(tmp, "bench.db")
+    print(f"Generating {args.rows} rows in {db_path}...")
+    make_synthetic_db(db_path, args.rows)
+
+    import server
+    from mock_ollama import MockConfig, create_app
+    server.init_database(db_path)
+    server._ensure_indexes(db_path, "materials")
+    if args.no_result_cache:
+        server.result_cache.max_entries = 0
+
+    ollama_port, mcp_port, client_port = free_port(), free_port(), free_port()
+    mock = create_app(MockConfig(args.load_ms, args.prefill_ms_per_token, args.token_ms, db_path, "materials"))
+    servers = [serve_in_thread(mock, ollama_port)]
+    server.mcp.settings.port = mcp_port
+    servers.append(serve_in_thread(server.mcp.sse_app(), mcp_port))
+
+    # client.py ayarlarını import sırasında ortamdan okuyor
+    os.environ.update({
+        "MCP_URL": f"http://127.0.0.1:{mcp_port}/sse",
+        "OLLAMA_BASE_URL": f"http://127.0.0.1:{ollama_port}",
+        "LLM_MODEL": "mock",
+        "DB_PATH": db_path,
+        "LLM_WARMUP": "1" if args.warmup else "0",
+        "FAST_PATH": "1" if args.fast_path else "0",
+        "RESPONSE_CACHE_ENTRIES": str(args.response_cache_entries),
+        "AGENT_POOL_SIZE": str(args.agents),
+        "PROMPT_MODE": args.prompt_mode,
+    })
+    import client
+    servers.append(serve_in_thread(client.app, client_port, timeout=60))
+    url = f"http://127.0.0.1:{client_port}/query"
+
+    print(f"\nagents={args.agents} prompt={args.prompt_mode} fast_path={args.fast_path} "
+          f"token_ms={args.token_ms} prefill_ms_per_token={args.prefill_ms_per_token}")
+    try:
+        for users in args.users:
+            client.tool_call_stats.reset()
+            client.llm_call_stats.reset()
+            mock.state.calls.reset()
+            r = asyncio.run(run_level(url, users, args.requests))
+            print(f"\n{'users':>6} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50':>11} {'p95':>11} {'p99':>11}")
+            print(f"{r['users']:>6} {r['requests']:>9} {r['errors']:>7} {r['throughput']:>8.2f} "
+                  f"{ms(r['p50']):>11} {ms(r['p95']):>11} {ms(r['p99']):>11}")
+            print_calls("tool", client.tool_call_stats.stats(), r["requests"])
+            print_calls("llm (client)", client.llm_call_stats.stats(), r["requests"])
+            print_calls("llm (server)", mock.state.calls.stats(), r["requests"])
+    finally:
+        for s in servers:
+            s.should_exit = True
+        close_pools()
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline end-to-end /query benchmark with a mock LLM and in-process MCP server")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--users", type=int, nargs="+", default=[1, 4, 8], help="Concurrent users per level")
+    parser.add_argument("--requests", type=int, default=24, help="Requests per level")
+    parser.add_argument("--agents", type=int, default=2, help="AGENT_POOL_SIZE")
+    parser.add_argument("--prompt_mode", type=str, default="compact", choices=["compact", "full"])
+    parser.add_argument("--token_ms", type=float, default=10.0, help="Mock decode time per generated token")
+    parser.add_argument("--prefill_ms_per_token", type=float, default=0.2, help="Mock prefill time per prompt token")
+    parser.add_argument("--load_ms", type=float, default=0.0, help="Mock model load time on the first call")
+    parser.add_argument("--warmup", action="store_true", help="Run the client's LLM warmup at startup")
+    parser.add_argument("--fast_path", action="store_true", help="Let the fast path answer canned queries")
+    parser.add_argument("--response_cache_entries", type=int, default=0)
+    parser.add_argument("--no_result_cache", action="store_true", help="Disable server.py's read result cache")
+    main(parser.parse_args())
@@ -0,0 +1,63 @@
+import random
+import socket
+import sqlite3
+import threading
+import time
+
+from call_stats import percentile  # noqa: F401  (benchmark'lar buradan alıyor)
+
+MATERIALS_SCHEMA = """CREATE TABLE IF NOT EXISTS "materials" (
+	"id"	INTEGER,
+	"item_name"	TEXT NOT NULL,
+	"quantity"	INTEGER DEFAULT 0,
+	"in_stock"	INTEGER,
+	"updated_at"	TIMESTAMP,
+	PRIMARY KEY("id")
+)"""
+
+
+def make_synthetic_db(db_path: str, rows: int, seed: int = 42, batch: int = 50_000):
+    """Create a kitchen.db-shaped database with `rows` generated materials"""
+    rnd = random.Random(seed)
+    conn = sqlite3.connect(db_path)
+    conn.execute("DROP TABLE IF EXISTS materials")
+    conn.execute(MATERIALS_SCHEMA)
+    for start in range(0, rows, batch):
+        chunk = [
+            (f"Item {i:07d}", rnd.randint(0, 100), rnd.randint(0, 1))
+            for i in range(start, min(start + batch, rows))
+        ]
+        conn.executemany(
+            "INSERT INTO materials (item_name, quantity, in_stock, updated_at) VALUES (?, ?, ?, CURRENT_TIMESTAMP)",
+            chunk,
+        )
+    conn.commit()
+    conn.close()
+
+
+def ms(seconds: float) -> str:
+    return f"{seconds * 1000:.2f} ms"
+
+
+def free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def serve_in_thread(app, port: int, timeout: float = 10.0):
+    """Run an ASGI app with uvicorn on a daemon thread (own event loop); returns the server, set should_exit to stop"""
+    import uvicorn
+
+    class _Server(uvicorn.Server):
+        def install_signal_handlers(self):
+            pass  # sinyaller ana thread'e ait
+
+    server = _Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + timeout
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Server on port {port} did not start")
+        time.sleep(0.05)
+    return server
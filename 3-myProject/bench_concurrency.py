@@ -0,0 +1,86 @@
+"""
+Concurrency benchmark for the kitchen MCP server tools.
+
+N parallel clients call the tools while a ticker coroutine measures event
+loop lag; with SQLite work on the executor, p99 should stay flat as N grows.
+Every client repeats the same calls, so server.py's result cache is off
+unless --result_cache is given; otherwise this would time LRU hits.
+
+    python bench_concurrency.py --rows 200000 --clients 1 2 4 8 16 32
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import server
+from bench_common import make_synthetic_db, percentile, ms
+from db_pool import configure_pools, configure_executor, close_pools
+
+
+async def _client(db_path: str, calls: int, latencies: list):
+    for i in range(calls):
+        start = time.perf_counter()
+        if i % 4 == 0:
+            await server.get_out_of_stock(db_path, "materials")
+        else:
+            await server.read_table(db_path, "materials", 10)
+        latencies.append(time.perf_counter() - start)
+
+
+async def _ticker(stop: asyncio.Event, lags: list, interval: float = 0.005):
+    """Measure how late the loop wakes us up; large values mean something blocked it"""
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        lags.append(time.perf_counter() - start - interval)
+
+
+async def run_level(db_path: str, clients: int, calls: int):
+    latencies, lags = [], []
+    stop = asyncio.Event()
+    ticker = asyncio.create_task(_ticker(stop, lags))
+    start = time.perf_counter()
+    await asyncio.gather(*(_client(db_path, calls, latencies) for _ in range(clients)))
+    wall = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return {
+        "clients": clients,
+        "calls": len(latencies),
+        "throughput": len(latencies) / wall,
+        "p50": percentile(latencies, 50),
+        "p99": percentile(latencies, 99),
+        "loop_lag_max": max(lags) if lags else 0.0,
+    }
+
+
+async def main(args):
+    configure_pools(args.pool_size)
+    configure_executor(args.db_workers)
+    if not args.result_cache:
+        server.result_cache.max_entries = 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        print(f"Generating {args.rows} rows...")
+        make_synthetic_db(db_path, args.rows)
+
+        print(f"{'clients':>8} {'calls':>6} {'req/s':>9} {'p50':>11} {'p99':>11} {'loop lag':>11}")
+        for n in args.clients:
+            r = await run_level(db_path, n, args.calls)
+            print(f"{r['clients']:>8} {r['calls']:>6} {r['throughput']:>9.1f} "
+                  f"{ms(r['p50']):>11} {ms(r['p99']):>11} {ms(r['loop_lag_max']):>11}")
+        close_pools()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Concurrency benchmark for server.py tools")
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--calls", type=int, default=20, help="Calls per client")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--pool_size", type=int, default=8)
+    parser.add_argument("--db_workers", type=int, default=8)
+    parser.add_argument("--result_cache", action="store_true", help="Keep server.py's read result cache on (measures cache hits)")
+    asyncio.run(main(parser.parse_args()))
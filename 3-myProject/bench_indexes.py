@@ -0,0 +1,77 @@
+"""
+Index benchmark for the materials lookups used by the server tools.
+
+Builds synthetic tables of growing size and times the item_name lookup
+(delete_item/update_item) and in_stock count (get_in_stock/get_out_of_stock)
+before and after ensure_indexes. Without indexes both scan the whole table.
+With them the item_name lookup stays ~flat (O(log n)); the in_stock count
+only skips the non-matching rows and still grows with the rows it counts.
+
+    python bench_indexes.py --sizes 10000 100000 1000000
+"""
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+from bench_common import make_synthetic_db, ms
+from db_schema import ensure_indexes
+
+LOOKUP_SQL = "SELECT * FROM materials WHERE item_name = ?"
+STOCK_COUNT_SQL = "SELECT COUNT(*) FROM materials WHERE in_stock = ?"
+
+
+def _time_query(conn, sql: str, params_list) -> float:
+    start = time.perf_counter()
+    for params in params_list:
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - start) / len(params_list)
+
+
+def _plan(conn, sql: str, params) -> str:
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", params).fetchall()
+    return "; ".join(row[-1] for row in rows)
+
+
+def bench_size(tmp: str, rows: int, lookups: int):
+    db_path = os.path.join(tmp, f"bench_{rows}.db")
+    make_synthetic_db(db_path, rows)
+    conn = sqlite3.connect(db_path)
+
+    names = [(f"Item {i * (rows // lookups):07d}",) for i in range(lookups)]
+    stock = [(i % 2,) for i in range(4)]
+
+    result = {"rows": rows}
+    result["lookup_before"] = _time_query(conn, LOOKUP_SQL, names)
+    result["count_before"] = _time_query(conn, STOCK_COUNT_SQL, stock)
+
+    ensure_indexes(conn, "materials")
+    conn.commit()
+
+    result["lookup_after"] = _time_query(conn, LOOKUP_SQL, names)
+    result["count_after"] = _time_query(conn, STOCK_COUNT_SQL, stock)
+    result["lookup_plan"] = _plan(conn, LOOKUP_SQL, names[0])
+    result["count_plan"] = _plan(conn, STOCK_COUNT_SQL, stock[0])
+    conn.close()
+    return result
+
+
+def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>9} {'lookup (scan)':>14} {'lookup (idx)':>13} {'count (scan)':>13} {'count (idx)':>12}")
+        results = []
+        for rows in args.sizes:
+            r = bench_size(tmp, rows, args.lookups)
+            results.append(r)
+            print(f"{r['rows']:>9} {ms(r['lookup_before']):>14} {ms(r['lookup_after']):>13} "
+                  f"{ms(r['count_before']):>13} {ms(r['count_after']):>12}")
+        print(f"\nitem_name plan: {results[-1]['lookup_plan']}")
+        print(f"in_stock plan:  {results[-1]['count_plan']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index benchmark for materials lookups")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--lookups", type=int, default=50, help="item_name lookups per size")
+    main(parser.parse_args())
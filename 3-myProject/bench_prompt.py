@@ -0,0 +1,151 @@
+"""
+Prompt size benchmark: full DB_INSIGHT_PROMPT vs the per-query compact prompt.
+
+For every query both variants build exactly the first LLM call the ReActAgent
+would make (system prompt + ReAct header + question). Each call goes to Ollama,
+which reports prefill (prompt_eval_*) and decode (eval_*) timings. Later steps
+add the same observations to either variant, so the first call carries the
+difference. Quality is checked on the step the model produces: is it valid
+ReAct, does it pick an expected tool, and are the key arguments right?
+
+Requires the MCP server (for the live tool schemas) and Ollama:
+
+    python server.py &
+    python bench_prompt.py --model gemma3:4b --repeat 3
+"""
+import argparse
+import asyncio
+import uuid
+
+from llama_index.core.agent.react import ReActChatFormatter
+from llama_index.core.agent.react.output_parser import ReActOutputParser
+from llama_index.core.agent.react.types import ActionReasoningStep
+from llama_index.core.llms import ChatMessage
+from llama_index.llms.ollama import Ollama
+from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
+
+from bench_common import percentile
+from prompt_builder import PromptBuilder, COMPACT_REACT_HEADER, DEFAULT_TOKEN_BUDGET, estimate_tokens
+from prompt_templates import DB_INSIGHT_PROMPT
+
+FULL_SYSTEM_PROMPT = DB_INSIGHT_PROMPT.template.replace("{tools}", "").replace("{tool_names}", "").replace("{input}", "")
+
+# (sorgu, kabul edilen araçlar, Action Input'ta olması gereken argümanlar)
+QUERIES = [
+    ("list the tables in kitchen.db", {"list_tables"}, {"db_path": "kitchen.db"}),
+    ("show the materials table in kitchen.db", {"read_table"}, {"table_name": "materials"}),
+    ("which items are out of stock in the materials table of kitchen.db?",
+     {"get_out_of_stock", "query_by_stock"}, {"table_name": "materials"}),
+    ("kitchen.db materials tablosunda stokta olan ürünler neler?",
+     {"get_in_stock", "query_by_stock"}, {"table_name": "materials"}),
+    ("how many items are out of stock in kitchen.db materials?",
+     {"get_out_of_stock", "query_by_stock", "summarize_inventory"}, {"table_name": "materials"}),
+    ("add item_name='Tuz' quantity=3 in_stock=1 to the materials table in kitchen.db",
+     {"add_item"}, {"item_name": "Tuz", "quantity": 3}),
+    ("delete item_name='Tuz' from the materials table in kitchen.db", {"delete_item"}, {"item_name": "Tuz"}),
+    ("kitchen.db materials tablosunda item_name='Tava' için quantity=5 olarak güncelle",
+     {"update_item"}, {"item_name": "Tava", "quantity": 5}),
+]
+
+
+def first_call_messages(tools, system_prompt: str, header: str, query: str, nonce: str = None):
+    """The messages of the agent's first LLM call for this query (ReActAgent folds the system prompt into the header)"""
+    formatter = ReActChatFormatter.from_defaults(system_header=header, context=system_prompt)
+    system, *rest = formatter.format(tools, chat_history=[ChatMessage(role="user", content=query)])
+    if nonce is not None:
+        system = ChatMessage(role="system", content=f"[{nonce}]\n{system.content}")
+    return [system, *rest]
+
+
+def score(text: str, expected_tools, expected_args):
+    """(valid ReAct step, right tool, right arguments) for the model's first step"""
+    try:
+        step = ReActOutputParser().parse(text)
+    except Exception:
+        return False, False, False
+    if not isinstance(step, ActionReasoningStep):
+        return True, False, False
+    tool_ok = step.action in expected_tools
+    args = step.action_input or {}
+    args_ok = tool_ok and all(str(args.get(k)) == str(v) for k, v in expected_args.items())
+    return True, tool_ok, args_ok
+
+
+async def run_variant(llm, tools, name: str, build_prompt, header, repeat: int, cold: bool):
+    rows = []
+    for query, expected_tools, expected_args in QUERIES:
+        system_prompt = build_prompt(query)
+        for _ in range(repeat):
+            # Başa eklenen nonce Ollama'nın önek cache'ini boşa çıkarır: her çağrı tam prefill
+            nonce = uuid.uuid4().hex[:8] if cold else None
+            messages = first_call_messages(tools, system_prompt, header, query, nonce)
+            response = await llm.achat(messages)
+            raw = dict(response.raw or {})
+            valid, tool_ok, args_ok = score(response.message.content or "", expected_tools, expected_args)
+            rows.append({
+                "est_tokens": sum(estimate_tokens(m.content or "") for m in messages),
+                "prompt_tokens": raw.get("prompt_eval_count") or 0,
+                "prefill": (raw.get("prompt_eval_duration") or 0) / 1e9,
+                "decode": (raw.get("eval_duration") or 0) / 1e9,
+                "total": (raw.get("total_duration") or 0) / 1e9,
+                "valid": valid,
+                "tool_ok": tool_ok,
+                "args_ok": args_ok,
+            })
+    n = len(rows)
+    prefill = [r["prefill"] for r in rows]
+    return {
+        "variant": name,
+        "calls": n,
+        "est_tokens": sum(r["est_tokens"] for r in rows) / n,
+        "prompt_tokens": sum(r["prompt_tokens"] for r in rows) / n,
+        "prefill_p50": percentile(prefill, 50),
+        "prefill_p95": percentile(prefill, 95),
+        "decode_avg": sum(r["decode"] for r in rows) / n,
+        "total_avg": sum(r["total"] for r in rows) / n,
+        "valid": sum(r["valid"] for r in rows) / n,
+        "tool_acc": sum(r["tool_ok"] for r in rows) / n,
+        "args_acc": sum(r["args_ok"] for r in rows) / n,
+    }
+
+
+async def main(args):
+    tools = await McpToolSpec(client=BasicMCPClient(args.mcp_url)).to_tool_list_async()
+    llm = Ollama(model=args.model, base_url=args.base_url, request_timeout=300, temperature=0.0,
+                 additional_kwargs={"num_predict": args.num_predict})
+    builder = PromptBuilder(tools, args.budget, default_db="kitchen.db")
+
+    variants = [
+        ("full", lambda q: FULL_SYSTEM_PROMPT, None),
+        ("compact", builder.build, COMPACT_REACT_HEADER),
+    ]
+    # Modeli belleğe yükle; ilk çağrının yükleme süresi ölçüme girmesin
+    await llm.achat([ChatMessage(role="user", content="hi")])
+
+    results = [await run_variant(llm, tools, name, build, header, args.repeat, not args.warm)
+               for name, build, header in variants]
+
+    print(f"\n{'variant':>8} {'est_tok':>8} {'prompt_tok':>10} {'prefill_p50':>12} {'prefill_p95':>12} "
+          f"{'decode':>8} {'total':>8} {'valid':>6} {'tool':>6} {'args':>6}")
+    for r in results:
+        print(f"{r['variant']:>8} {r['est_tokens']:>8.0f} {r['prompt_tokens']:>10.0f} "
+              f"{r['prefill_p50'] * 1000:>10.0f}ms {r['prefill_p95'] * 1000:>10.0f}ms "
+              f"{r['decode_avg'] * 1000:>6.0f}ms {r['total_avg'] * 1000:>6.0f}ms "
+              f"{r['valid']:>6.0%} {r['tool_acc']:>6.0%} {r['args_acc']:>6.0%}")
+    full, compact = results
+    if compact["prefill_p50"]:
+        print(f"\nPrefill speedup (p50): {full['prefill_p50'] / compact['prefill_p50']:.1f}x, "
+              f"prompt tokens: {full['prompt_tokens']:.0f} -> {compact['prompt_tokens']:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare prefill time and answer quality of the full and compact prompts")
+    parser.add_argument("--mcp_url", type=str, default="http://127.0.0.1:3002/sse")
+    parser.add_argument("--model", type=str, default="gemma3:4b")
+    parser.add_argument("--base_url", type=str, default="http://127.0.0.1:11434")
+    parser.add_argument("--budget", type=int, default=DEFAULT_TOKEN_BUDGET, help="Token budget for the compact prompt")
+    parser.add_argument("--repeat", type=int, default=3, help="Calls per query and variant")
+    parser.add_argument("--num_predict", type=int, default=128, help="Max tokens generated per call (only the first step is scored)")
+    parser.add_argument("--warm", action="store_true", help="Let Ollama reuse the cached prompt prefix between calls")
+    args = parser.parse_args()
+    asyncio.run(main(args))
@@ -0,0 +1,59 @@
+import math
+import threading
+from collections import defaultdict, deque
+from typing import Any, Dict
+
+DEFAULT_WINDOW = 1000  # isim başına saklanan son ölçüm sayısı
+
+
+def percentile(values, p: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(p / 100 * len(ordered)) - 1))
+    return ordered[k]
+
+
+class CallStats:
+    """Latency of calls grouped by name (tool name, model name); percentiles over the last `window` calls"""
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.window = window
+        self._samples = defaultdict(lambda: deque(maxlen=self.window))
+        self._counts = defaultdict(int)
+        self._errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def record(self, name: str, seconds: float, error: bool = False):
+        with self._lock:
+            self._samples[name].append(seconds)
+            self._counts[name] += 1
+            if error:
+                self._errors[name] += 1
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+            self._counts.clear()
+            self._errors.clear()
+
+    def total_calls(self) -> int:
+        with self._lock:
+            return sum(self._counts.values())
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            snapshot = {name: (list(samples), self._counts[name], self._errors[name])
+                        for name, samples in self._samples.items()}
+        return {
+            name: {
+                "calls": count,
+                "errors": errors,
+                "avg_ms": round(sum(samples) / len(samples) * 1000, 2),
+                "p50_ms": round(percentile(samples, 50) * 1000, 2),
+                "p95_ms": round(percentile(samples, 95) * 1000, 2),
+                "max_ms": round(max(samples) * 1000, 2),
+            }
+            for name, (samples, count, errors) in snapshot.items()
+        }
@@ -1,55 +1,334 @@
 import asyncio
+import json
 import os
 import sys
-from llama_index.tools.mcp import BasicMCPClient, McpToolSpec
+import time
+from llama_index.tools.mcp import McpToolSpec
 from llama_index.core.agent.workflow.react_agent import ReActAgent
+from llama_index.core.agent.workflow import AgentStream, ToolCall, ToolCallResult, AgentOutput
+from llama_index.core.agent.react import ReActChatFormatter
+from llama_index.core.llms import ChatMessage
+from llama_index.core.instrumentation import get_dispatcher
+from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+from llama_index.core.instrumentation.events.llm import LLMChatStartEvent, LLMChatEndEvent
 from llama_index.llms.ollama import Ollama
 from prompt_templates import DB_INSIGHT_PROMPT
+from prompt_builder import PromptBuilder, COMPACT_REACT_HEADER, DEFAULT_TOKEN_BUDGET
+from llm_warmup import (
+    ColdWarmTracker, warmup, format_warmup, parse_keep_alive, keep_alive_value,
+    DEFAULT_KEEP_ALIVE, DEFAULT_NUM_CTX, WARMUP_QUERY,
+)
+from fast_path import FastPathRouter, parse_tool_result, READ_ONLY_INTENTS, WRITE_WORDS_RE
+from mcp_session import MCPSessionManager, DEFAULT_HEARTBEAT_INTERVAL
+from response_cache import ResponseCache, DEFAULT_RESPONSE_CACHE_ENTRIES
+from call_stats import CallStats
+from voice_query import VoicePipeline, run_voice, DEFAULT_VOSK_MODEL, DEFAULT_MAX_PENDING
+from voice_grammar import GrammarUpdater, DEFAULT_GRAMMAR_INTERVAL
+from vad import DEFAULT_THRESHOLD_DB, DEFAULT_MARGIN_DB, DEFAULT_HANGOVER_MS, DEFAULT_PREROLL_MS
+from audio_ring import DEFAULT_MAX_LAG, DROP_OLDEST
+from agent_pool import AgentPool, SessionStore, PoolBusyError, DEFAULT_AGENT_POOL_SIZE, DEFAULT_MAX_WAITING, DEFAULT_SESSION_HISTORY
 from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
 import uvicorn
 
 # Configuration variables
 MCP_URL = os.environ.get("MCP_URL", "http://127.0.0.1:3002/sse")
+MCP_HEARTBEAT = float(os.environ.get("MCP_HEARTBEAT", str(DEFAULT_HEARTBEAT_INTERVAL)))
+# Bağlantı koparsa yeniden denenmesi güvenli (yan etkisiz) araçlar
+RETRY_TOOLS = READ_ONLY_INTENTS | {"query_by_stock", "summarize_inventory", "db_version", "cache_stats", "pool_stats"}
 MODEL_NAME = os.environ.get("LLM_MODEL", "gemma3:4b")
 OLLAMA_BASE_URL = os.environ.get("OLLAMA_BASE_URL", "http://127.0.0.1:11434")
 TEMPERATURE = float(os.environ.get("LLM_TEMPERATURE", "0.1"))
+OLLAMA_KEEP_ALIVE = keep_alive_value(os.environ.get("OLLAMA_KEEP_ALIVE", DEFAULT_KEEP_ALIVE))  # "-1": hiç boşaltma
+# num_ctx sabit kalmalı: değişirse Ollama modeli yeniden yükler ve önek cache'i kaybolur
+OLLAMA_NUM_CTX = int(os.environ.get("OLLAMA_NUM_CTX", str(DEFAULT_NUM_CTX)))
+LLM_WARMUP = os.environ.get("LLM_WARMUP", "1") == "1"
+DB_PATH = os.environ.get("DB_PATH", "kitchen.db")
+FAST_PATH_ENABLED = os.environ.get("FAST_PATH", "1") == "1"
+# Çok parçalı sorularda bağımsız okumaları eşzamanlı çalıştır. Şablonlu cevaplar da ürettiği için
+# FAST_PATH=0 bunu da kapatır: ajan her soruyu kendisi cevaplar
+PARALLEL_TOOLS = FAST_PATH_ENABLED and os.environ.get("PARALLEL_TOOLS", "1") == "1"
+RESPONSE_CACHE_ENTRIES = int(os.environ.get("RESPONSE_CACHE_ENTRIES", str(DEFAULT_RESPONSE_CACHE_ENTRIES)))
+# örn. response_cache.json; boşsa sadece bellekte. Sadece client yeniden başlatmalarında korunur:
+# MCP sunucusu yeniden başlayınca db versiyon token'ı değişir ve kayıtlı cevaplar atılır
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH")
+AGENT_POOL_SIZE = int(os.environ.get("AGENT_POOL_SIZE", str(DEFAULT_AGENT_POOL_SIZE)))
+AGENT_MAX_WAITING = int(os.environ.get("AGENT_MAX_WAITING", str(DEFAULT_MAX_WAITING)))
+SESSION_HISTORY = int(os.environ.get("SESSION_HISTORY", str(DEFAULT_SESSION_HISTORY)))
+PROMPT_MODE = os.environ.get("PROMPT_MODE", "compact")  # "compact": sorguya göre kısa prompt, "full": DB_INSIGHT_PROMPT
+VOICE_INPUT = os.environ.get("VOICE_INPUT", "0") == "1"  # mikrofondan gelen komutları da cevapla (vosk + sounddevice gerekir)
+VOSK_MODEL_PATH = os.environ.get("VOSK_MODEL_PATH", DEFAULT_VOSK_MODEL)
+VOICE_MAX_PENDING = int(os.environ.get("VOICE_MAX_PENDING", str(DEFAULT_MAX_PENDING)))
+VOICE_GRAMMAR = os.environ.get("VOICE_GRAMMAR", "1") == "1"  # tanımayı komut kelimeleri + ürün adlarıyla sınırla
+VOICE_GRAMMAR_INTERVAL = float(os.environ.get("VOICE_GRAMMAR_INTERVAL", str(DEFAULT_GRAMMAR_INTERVAL)))
+VOICE_VAD = os.environ.get("VOICE_VAD", "1") == "1"  # sessizliği tanıyıcıya hiç verme
+VAD_THRESHOLD_DB = float(os.environ.get("VAD_THRESHOLD_DB", str(DEFAULT_THRESHOLD_DB)))
+VAD_MARGIN_DB = float(os.environ.get("VAD_MARGIN_DB", str(DEFAULT_MARGIN_DB)))
+VAD_HANGOVER_MS = int(os.environ.get("VAD_HANGOVER_MS", str(DEFAULT_HANGOVER_MS)))
+VAD_PREROLL_MS = int(os.environ.get("VAD_PREROLL_MS", str(DEFAULT_PREROLL_MS)))
+VOICE_MAX_LAG = float(os.environ.get("VOICE_MAX_LAG", str(DEFAULT_MAX_LAG)))  # tanıma en fazla bu kadar saniye geride kalır
+VOICE_OVERRUN_POLICY = os.environ.get("VOICE_OVERRUN_POLICY", DROP_OLDEST)  # "drop_oldest" veya "drop_newest"
+PROMPT_TOKEN_BUDGET = int(os.environ.get("PROMPT_TOKEN_BUDGET", str(DEFAULT_TOKEN_BUDGET)))
+
+SYSTEM_PROMPT = DB_INSIGHT_PROMPT.template.replace("{tools}", "").replace("{tool_names}", "").replace("{input}", "")
 
 app = FastAPI()
-agent = None  # global agent objesi
+agent_pool = None  # istek başına ödünç verilen ajanlar
+sessions = SessionStore(SESSION_HISTORY)
+mcp_client = None
+tools = None
+llm = None
+fast_path = None
+prompt_builder = None  # sadece PROMPT_MODE=compact
+llm_tracker = ColdWarmTracker(parse_keep_alive(OLLAMA_KEEP_ALIVE))
+tool_call_stats = CallStats()  # MCP araç çağrısı başına süre
+llm_call_stats = CallStats()   # LLM çağrısı (ajan adımı) başına süre
+stream_stats = {"requests": 0, "ttfb": 0.0, "first_token": 0.0, "first_token_count": 0, "total": 0.0}
+response_cache = ResponseCache(RESPONSE_CACHE_ENTRIES, RESPONSE_CACHE_PATH)
+voice_pipeline = None
+voice_recognizer = None
+voice_grammar = None
+voice_task = None
 
 
-async def setup_agent():
-    """Setup and return the SQLite database assistant agent"""
+class LLMTimingHandler(BaseEventHandler):
+    """Times each LLM chat call (streaming included) from llama_index's start/end instrumentation events"""
+
+    @classmethod
+    def class_name(cls) -> str:
+        return "LLMTimingHandler"
+
+    def handle(self, event, **kwargs):
+        if isinstance(event, LLMChatStartEvent):
+            _llm_call_starts[event.span_id] = time.perf_counter()
+        elif isinstance(event, LLMChatEndEvent):
+            start = _llm_call_starts.pop(event.span_id, None)
+            if start is not None:
+                llm_call_stats.record(MODEL_NAME, time.perf_counter() - start)
+
+
+_llm_call_starts = {}
+get_dispatcher().add_event_handler(LLMTimingHandler())
+
+
+async def get_db_version():
+    """Ask the MCP server for the current db version token (None if unavailable)"""
+    try:
+        result = parse_tool_result(await mcp_client.call_tool("db_version", {"db_path": DB_PATH}))
+        return result.get("version")
+    except Exception as e:
+        print(f"⚠️ Could not read db version: {e}")
+        return None
+
+
+async def setup_resources():
+    """Connect to MCP and create the tool list and LLM client shared by every agent"""
+    global mcp_client, tools, llm, fast_path, prompt_builder
     print(f"Connecting to MCP server at {MCP_URL}")
-    mcp_client = BasicMCPClient(MCP_URL)
+    mcp_client = MCPSessionManager(MCP_URL, heartbeat_interval=MCP_HEARTBEAT, retry_tools=RETRY_TOOLS,
+                                   on_tools_changed=refresh_tools, call_stats=tool_call_stats)
+    await mcp_client.start()
+    fast_path = FastPathRouter(mcp_client.call_tool, default_db=DB_PATH)
 
     tools = await McpToolSpec(client=mcp_client).to_tool_list_async()
     print(f"Found {len(tools)} tools")
+    if PROMPT_MODE == "compact":
+        prompt_builder = PromptBuilder(tools, PROMPT_TOKEN_BUDGET, default_db=DB_PATH)
+
+    llm = make_llm()
+
 
-    llm = Ollama(
+async def refresh_tools(_result=None):
+    """Rebuild the tool list after the server announced tools/list_changed (agents pick it up on their next run)"""
+    global tools
+    tools = await McpToolSpec(client=mcp_client).to_tool_list_async()
+    if prompt_builder is not None:
+        prompt_builder.set_tools(tools)
+    print(f"🔄 MCP tool list changed: {len(tools)} tools")
+
+
+def make_llm(**options):
+    """Ollama client; every instance uses the same keep_alive and num_ctx so they share the loaded model"""
+    return Ollama(
         model=MODEL_NAME,
         base_url=OLLAMA_BASE_URL,
         request_timeout=120,
-        temperature=TEMPERATURE
+        temperature=TEMPERATURE,
+        context_window=OLLAMA_NUM_CTX,
+        keep_alive=OLLAMA_KEEP_ALIVE,
+        additional_kwargs=options
     )
 
-    system_prompt = DB_INSIGHT_PROMPT.template.replace("{tools}", "").replace("{tool_names}", "").replace("{input}", "")
-    agent_instance = ReActAgent(
+
+def build_agent():
+    """Create a ReActAgent over the shared tools and LLM client"""
+    if prompt_builder is None:
+        return ReActAgent(
+            name="SQLiteAgent",
+            llm=llm,
+            tools=tools,
+            system_prompt=SYSTEM_PROMPT,
+            temperature=TEMPERATURE
+        )
+    # Varsayılan ReAct başlığı her aracın JSON şemasını ekler; araçları PromptBuilder kısaca yazıyor
+    prompt = prompt_builder.build()
+    return ReActAgent(
         name="SQLiteAgent",
         llm=llm,
         tools=tools,
-        system_prompt=system_prompt,
+        system_prompt=prompt,
+        formatter=ReActChatFormatter.from_defaults(system_header=COMPACT_REACT_HEADER, context=prompt),
         temperature=TEMPERATURE
     )
-    return agent_instance
+
+
+def prepare_agent(agent, user_query: str):
+    """Give the agent the current tools and a system prompt tailored to this query (the agent is not shared while it runs)"""
+    agent.tools = tools
+    if prompt_builder is not None:
+        # ReActAgent sistem mesajını atıp formatter.context'i kullanıyor; ikisi de güncellenir
+        prompt = prompt_builder.build(user_query)
+        agent.system_prompt = prompt
+        agent.formatter.context = prompt
+    return agent
+
+
+async def warmup_llm():
+    """Load the model and prime the static prompt prefix so the first real query does not pay for them"""
+    agent = prepare_agent(build_agent(), WARMUP_QUERY)
+    messages = agent.formatter.format(tools, chat_history=[ChatMessage(role="user", content=WARMUP_QUERY)])
+    try:
+        # Tek token üretmek yeterli: amaç modeli yüklemek ve öneki KV cache'e almak
+        result = await warmup(make_llm(num_predict=1), messages)
+    except Exception as e:
+        print(f"⚠️ LLM warmup failed: {e}")
+        return
+    llm_tracker.warmup = result
+    llm_tracker.touch()
+    print(f"🔥 LLM warmup: {format_warmup(result)}")
+
+
+async def setup_agent():
+    """Setup and return the SQLite database assistant agent"""
+    await setup_resources()
+    return build_agent()
 
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize the agent when FastAPI starts"""
-    global agent
-    agent = await setup_agent()
-    print("✅ Agent initialized and ready to receive requests!")
+    """Initialize the agent pool when FastAPI starts"""
+    global agent_pool
+    await setup_resources()
+    agent_pool = AgentPool(build_agent, AGENT_POOL_SIZE, AGENT_MAX_WAITING)
+    if LLM_WARMUP:
+        await warmup_llm()
+    response_cache.load()
+    print(f"✅ {AGENT_POOL_SIZE} agents initialized and ready to receive requests!")
+    if VOICE_INPUT:
+        start_voice()
+
+
+def start_voice():
+    """Answer spoken commands in this process, next to the HTTP API"""
+    global voice_pipeline, voice_recognizer, voice_grammar, voice_task
+    # vosk/sounddevice sadece sesli giriş açıkken gerekli
+    from vosk_model import VoskRecognizer
+    from vad import EnergyVAD
+    vad = EnergyVAD(threshold_db=VAD_THRESHOLD_DB, margin_db=VAD_MARGIN_DB, hangover_ms=VAD_HANGOVER_MS,
+                    preroll_ms=VAD_PREROLL_MS) if VOICE_VAD else None
+    voice_recognizer = VoskRecognizer(VOSK_MODEL_PATH, vad=vad, max_lag=VOICE_MAX_LAG, overrun_policy=VOICE_OVERRUN_POLICY)
+    voice_pipeline = VoicePipeline(answer_query, VOICE_MAX_PENDING)
+    if VOICE_GRAMMAR:
+        voice_grammar = GrammarUpdater(voice_recognizer, mcp_client.call_tool, DB_PATH, interval=VOICE_GRAMMAR_INTERVAL)
+    voice_task = asyncio.create_task(run_voice(voice_pipeline, voice_recognizer, voice_grammar))
+    return voice_task
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Persist the response cache if a path is configured and close the MCP session"""
+    if voice_task is not None:
+        voice_task.cancel()
+    response_cache.save()
+    if mcp_client is not None:
+        await mcp_client.close()
+
+
+def with_prefetched(user_query: str, parallel: dict) -> str:
+    """Agent input carrying the tool results already fetched in parallel, so the agent only works on the rest"""
+    lines = [user_query, "", "Tool results already fetched for parts of this question (do not call these again):"]
+    for call, data in zip(parallel["calls"], parallel["observations"]):
+        lines.append(f"- {call['tool']}({json.dumps(call['args'], ensure_ascii=False)}): "
+                     f"{json.dumps(data, ensure_ascii=False, default=str)}")
+    return "\n".join(lines)
+
+
+async def try_shortcuts(user_query: str):
+    """Answer without the LLM when the tools alone can: returns (response, agent_input, parallel)
+
+    Independent read-only parts of a multi-part question run concurrently. If some part needs
+    the agent, their results are handed to it instead of being fetched again step by step.
+    """
+    parallel = await fast_path.run_parallel(user_query) if PARALLEL_TOOLS else None
+    if parallel is not None:
+        if parallel["response"] is not None:
+            return parallel["response"], None, parallel
+        return None, with_prefetched(user_query, parallel), parallel
+
+    # Bilinen kalıplar LLM'e hiç gitmeden doğrudan MCP aracıyla cevaplanır
+    if FAST_PATH_ENABLED:
+        response = await fast_path.try_handle(user_query)
+        if response is not None:
+            return response, None, None
+    return None, user_query, None
+
+
+async def answer_query(user_query: str, session_id: str = None) -> dict:
+    """Answer one query through the shortcuts, the response cache or a pooled agent (raises PoolBusyError)"""
+    print(f"🧠 Processing query: {user_query}")
+    try:
+        fast_response, agent_input, parallel = await try_shortcuts(user_query)
+        if fast_response is not None:
+            result = {"response": fast_response, "fast_path": True}
+            if parallel is not None:
+                result["parallel_calls"] = len(parallel["calls"])
+            return result
+
+        # Önceki mesajlara bağlı cevaplar ortak cache'e girmez
+        history = sessions.history(session_id) if session_id else []
+
+        # Aynı soru aynı db versiyonunda daha önce cevaplandıysa ajanı çalıştırma.
+        # Yazma komutları hiç cache'lenmez: başarısız ya da hiç çalışmamış bir yazma versiyonu
+        # değiştirmez, tekrarı eski hatayı döndürür ve komut bir daha denenmezdi
+        cacheable = not history and not WRITE_WORDS_RE.search(user_query)
+        version = await get_db_version() if cacheable else None
+        if version is not None:
+            cached = response_cache.get(user_query, version)
+            if cached is not None:
+                return {"response": cached, "cached": True}
+
+        start = time.perf_counter()
+        async with agent_pool.acquire() as agent:
+            kind = llm_tracker.start()
+            run_start = time.perf_counter()
+            response = await prepare_agent(agent, user_query).run(agent_input, chat_history=history)
+            run_time = time.perf_counter() - run_start
+            llm_tracker.finish(kind, run_time)
+        fast_path.record_agent_time(time.perf_counter() - start)
+        print(f"{'🧊' if kind == 'cold' else '♨️'} {kind} agent run: {run_time * 1000:.0f}ms")
+
+        if session_id:
+            sessions.append(session_id, ChatMessage(role="user", content=user_query),
+                            ChatMessage(role="assistant", content=str(response)))
+
+        # Sadece okuma yapan cevaplar saklanır: çalışma sırasında versiyon değiştiyse bir yazma oldu
+        if version is not None and await get_db_version() == version:
+            response_cache.put(user_query, version, str(response))
+        return {"response": str(response), "fast_path": False}
+    except PoolBusyError:
+        raise
+    except Exception as e:
+        return {"error": str(e)}
 
 
 @app.post("/query")
@@ -57,16 +336,137 @@ async def handle_query(request: Request):
     """Endpoint to process database queries"""
     data = await request.json()
     user_query = data.get("query")
+    session_id = data.get("session_id")  # opsiyonel: aynı oturumun önceki mesajları ajana verilir
 
     if not user_query:
         return {"error": "Missing 'query' field in JSON body"}
+    try:
+        return await answer_query(user_query, session_id)
+    except PoolBusyError as e:
+        return JSONResponse(status_code=503, content={"error": str(e)})
+
+
+def sse_event(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+
+async def stream_query(user_query: str, session_id: str = None):
+    """Yield SSE events for one query: agent tokens, tool calls, tool results, the final answer and timings"""
+    start = time.perf_counter()
+    first_token = None
+
+    def elapsed_ms(t):
+        return round((t - start) * 1000, 2) if t is not None else None
+
+    # Bağlantı açılır açılmaz bir olay gönder: istemci ilk baytı hemen alır
+    yield sse_event("start", {"query": user_query})
+    first_byte = time.perf_counter()
 
-    print(f"🧠 Processing query: {user_query}")
     try:
-        response = await agent.run(user_query)
-        return {"response": str(response)}
+        response, agent_input, parallel = await try_shortcuts(user_query)
+        if parallel is not None:
+            for call, data in zip(parallel["calls"], parallel["observations"]):
+                yield sse_event("tool_result", {"tool": call["tool"], "args": call["args"], "output": data, "parallel": True})
+        if response is not None:
+            yield sse_event("final", {"response": response, "fast_path": True})
+        else:
+            history = sessions.history(session_id) if session_id else []
+            async with agent_pool.acquire() as agent:
+                kind = llm_tracker.start()
+                run_start = time.perf_counter()
+                handler = prepare_agent(agent, user_query).run(agent_input, chat_history=history)
+                try:
+                    async for ev in handler.stream_events():
+                        if isinstance(ev, AgentStream):
+                            if ev.delta:
+                                if first_token is None:
+                                    first_token = time.perf_counter()
+                                yield sse_event("token", {"delta": ev.delta})
+                        elif isinstance(ev, ToolCallResult):
+                            yield sse_event("tool_result", {"tool": ev.tool_name, "output": str(ev.tool_output.content)})
+                        elif isinstance(ev, ToolCall):
+                            yield sse_event("tool_call", {"tool": ev.tool_name, "args": ev.tool_kwargs})
+                        elif isinstance(ev, AgentOutput) and ev.tool_calls:
+                            yield sse_event("thought", {"tool_calls": [t.tool_name for t in ev.tool_calls]})
+                    response = str(await handler)
+                    llm_tracker.finish(kind, time.perf_counter() - run_start)
+                finally:
+                    # İstemci koptuysa ajanı boşuna çalıştırmaya devam etme
+                    if not handler.done():
+                        await handler.cancel_run()
+
+            if session_id:
+                sessions.append(session_id, ChatMessage(role="user", content=user_query),
+                                ChatMessage(role="assistant", content=response))
+            fast_path.record_agent_time(time.perf_counter() - start)
+            yield sse_event("final", {"response": response, "fast_path": False})
+    except PoolBusyError as e:
+        yield sse_event("error", {"error": str(e), "status": 503})
     except Exception as e:
-        return {"error": str(e)}
+        yield sse_event("error", {"error": str(e)})
+
+    total = time.perf_counter() - start
+    stream_stats["requests"] += 1
+    stream_stats["ttfb"] += first_byte - start
+    stream_stats["total"] += total
+    if first_token is not None:
+        stream_stats["first_token"] += first_token - start
+        stream_stats["first_token_count"] += 1
+    print(f"⏱️ stream ttfb={elapsed_ms(first_byte)}ms first_token={elapsed_ms(first_token)}ms total={elapsed_ms(start + total)}ms")
+    yield sse_event("done", {
+        "ttfb_ms": elapsed_ms(first_byte),
+        "first_token_ms": elapsed_ms(first_token),
+        "total_ms": elapsed_ms(start + total),
+    })
+
+
+@app.post("/query/stream")
+async def handle_query_stream(request: Request):
+    """Same as /query, but streams the agent's workflow events as Server-Sent Events"""
+    data = await request.json()
+    user_query = data.get("query")
+
+    if not user_query:
+        return {"error": "Missing 'query' field in JSON body"}
+
+    print(f"🧠 Streaming query: {user_query}")
+    return StreamingResponse(
+        stream_query(user_query, data.get("session_id")),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _stream_stats():
+    n = stream_stats["requests"]
+    if not n:
+        return {"requests": 0}
+    first_tokens = stream_stats["first_token_count"]
+    return {
+        "requests": n,
+        "avg_ttfb_ms": round(stream_stats["ttfb"] / n * 1000, 2),
+        "avg_first_token_ms": round(stream_stats["first_token"] / first_tokens * 1000, 2) if first_tokens else None,
+        "avg_total_ms": round(stream_stats["total"] / n * 1000, 2),
+    }
+
+
+@app.get("/stats")
+async def stats():
+    """Fast-path, response cache, agent pool, streaming, prompt size and per-call latency counters"""
+    return {
+        "fast_path": fast_path.stats() if fast_path else None,
+        "response_cache": response_cache.stats(),
+        "agent_pool": agent_pool.stats() if agent_pool else None,
+        "sessions": len(sessions),
+        "stream": _stream_stats(),
+        "prompt": prompt_builder.stats() if prompt_builder else {"mode": PROMPT_MODE},
+        "llm": llm_tracker.stats(),
+        "mcp": mcp_client.stats() if mcp_client else None,
+        "tool_calls": tool_call_stats.stats(),
+        "llm_calls": llm_call_stats.stats(),
+        "voice": {**voice_pipeline.stats(), "recognizer": voice_recognizer.stats(),
+                  "grammar": voice_grammar.stats() if voice_grammar else None} if voice_pipeline else None,
+    }
 
 
 async def cli_mode():
@@ -78,13 +478,30 @@ async def cli_mode():
         if user_query.lower() in ["exit", "quit", "q"]:
             print("Goodbye!")
             break
-        response = await agent_instance.run(user_query)
+        response = await prepare_agent(agent_instance, user_query).run(user_query)
         print(f"\n{response}")
 
 
+async def voice_mode():
+    """Run with the microphone as the only input"""
+    print("\n🎙️ SQLite Database Assistant (Voice Mode)")
+    await startup_event()
+    try:
+        await (voice_task or start_voice())
+    finally:
+        if voice_pipeline is not None:
+            print(f"\n📊 {voice_pipeline.stats()}")
+        await shutdown_event()
+
+
 if __name__ == "__main__":
-    mode = os.environ.get("MODE", "api")  # "cli" or "api"
+    mode = os.environ.get("MODE", "api")  # "cli", "voice" or "api"
     if mode == "cli":
         asyncio.run(cli_mode())
+    elif mode == "voice":
+        try:
+            asyncio.run(voice_mode())
+        except KeyboardInterrupt:
+            pass
     else:
         uvicorn.run("client:app", host="0.0.0.0", port=8080)
@@ -0,0 +1,355 @@
+import asyncio
+import functools
+import os
+import random
+import sqlite3
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Any
+
+DEFAULT_POOL_SIZE = 4
+DEFAULT_IDLE_TIMEOUT = 300.0  # saniye
+DEFAULT_DB_WORKERS = 8
+
+# RETURNING SQLite 3.35.0 ile geldi; daha eskilerde SELECT ile okunur
+HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+pool_config = {
+    "size": DEFAULT_POOL_SIZE,
+    "idle_timeout": DEFAULT_IDLE_TIMEOUT,
+    # Bağlantı başına hazır (prepared) statement sayısı; aynı SQL metni tekrar parse edilmez
+    "statement_cache_size": 128,
+}
+
+# Veritabanı açılışta bir kez WAL'a alınır; diğerleri her bağlantıda uygulanır
+pragma_config = {
+    "journal_mode": "wal",
+    "synchronous": "NORMAL",
+    "busy_timeout": 5000,   # ms
+    "cache_size": -16000,   # negatif = KiB (16 MB)
+    "mmap_size": 0,         # byte, 0 = kapalı
+}
+
+retry_config = {
+    "attempts": 5,
+    "base_delay": 0.05,  # saniye
+    "max_delay": 1.0,
+}
+retry_stats = {"retries": 0}
+
+
+def _apply_pragmas(conn, write: bool):
+    conn.execute(f"PRAGMA busy_timeout = {int(pragma_config['busy_timeout'])}")
+    conn.execute(f"PRAGMA cache_size = {int(pragma_config['cache_size'])}")
+    conn.execute(f"PRAGMA mmap_size = {int(pragma_config['mmap_size'])}")
+    if write:
+        conn.execute(f"PRAGMA synchronous = {pragma_config['synchronous']}")
+
+
+def connect_db(db_path: str):
+    """ Connect database (read-only)"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, check_same_thread=False,
+                           cached_statements=pool_config["statement_cache_size"])
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn, write=False)
+    return conn
+
+def connect_db_write(db_path: str):
+    """Connect database (write mode)"""
+    conn = sqlite3.connect(db_path, check_same_thread=False,
+                           cached_statements=pool_config["statement_cache_size"])
+    conn.row_factory = sqlite3.Row
+    _apply_pragmas(conn, write=True)
+    return conn
+
+
+def configure_pragmas(journal_mode: str = None, synchronous: str = None, busy_timeout: int = None,
+                      cache_size: int = None, mmap_size: int = None):
+    """Override the pragmas applied to connections opened from now on"""
+    for key, value in (("journal_mode", journal_mode), ("synchronous", synchronous),
+                       ("busy_timeout", busy_timeout), ("cache_size", cache_size),
+                       ("mmap_size", mmap_size)):
+        if value is not None:
+            pragma_config[key] = value
+
+
+def configure_retry(attempts: int = None, base_delay: float = None, max_delay: float = None):
+    """Override the SQLITE_BUSY retry policy used by retry_on_busy"""
+    for key, value in (("attempts", attempts), ("base_delay", base_delay), ("max_delay", max_delay)):
+        if value is not None:
+            retry_config[key] = value
+
+
+def init_database(db_path: str) -> Dict[str, Any]:
+    """Switch the db file to the configured journal mode and report the effective settings"""
+    conn = connect_db_write(db_path)
+    try:
+        mode = conn.execute(f"PRAGMA journal_mode = {pragma_config['journal_mode']}").fetchone()[0]
+        return {
+            "db_path": db_path,
+            "journal_mode": mode,
+            "synchronous": conn.execute("PRAGMA synchronous").fetchone()[0],
+            "busy_timeout": conn.execute("PRAGMA busy_timeout").fetchone()[0],
+            "cache_size": conn.execute("PRAGMA cache_size").fetchone()[0],
+            "mmap_size": conn.execute("PRAGMA mmap_size").fetchone()[0],
+        }
+    finally:
+        conn.close()
+
+
+def is_busy_error(e: Exception) -> bool:
+    if not isinstance(e, sqlite3.OperationalError):
+        return False
+    msg = str(e).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def retry_on_busy(func: Callable[..., Any]) -> Callable[..., Any]:
+    """Retry func with exponential backoff + jitter while SQLite reports SQLITE_BUSY/locked"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        attempt = 0
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except sqlite3.OperationalError as e:
+                attempt += 1
+                if not is_busy_error(e) or attempt >= retry_config["attempts"]:
+                    raise
+                retry_stats["retries"] += 1
+                delay = min(retry_config["max_delay"], retry_config["base_delay"] * 2 ** (attempt - 1))
+                time.sleep(delay * random.uniform(0.5, 1.0))
+    return wrapper
+
+
+
+class ConnectionPool:
+    """Long-lived connections for one db file: read-only readers and a single serialized writer"""
+
+    def __init__(self, db_path: str, size: int = DEFAULT_POOL_SIZE, idle_timeout: float = DEFAULT_IDLE_TIMEOUT):
+        self.db_path = db_path
+        self.size = size
+        self.idle_timeout = idle_timeout
+
+        # Boştaki reader'lar (conn, last_used); en yeni sağda, en eski solda
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._open_readers = 0
+
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self._writer_last_used = 0.0
+
+        # data_version bağlantıya göre değişir; hep aynı bağlantıdan sorulmalı
+        self._monitor = None
+        self._monitor_lock = threading.Lock()
+        self.created_at = time.time()
+
+        self._stats = {"opened": 0, "reused": 0, "evicted": 0, "waits": 0}
+
+    def _evict_idle(self, now: float):
+        """Close reader connections that have been idle longer than idle_timeout"""
+        expired = []
+        with self._lock:
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+                self._open_readers -= 1
+                self._stats["evicted"] += 1
+        for conn in expired:
+            conn.close()
+
+        # Writer da uzun süre boşta kaldıysa kapat (kullanımdaysa dokunma)
+        if self._writer is not None and self._writer_lock.acquire(blocking=False):
+            try:
+                if self._writer is not None and now - self._writer_last_used > self.idle_timeout:
+                    self._writer.close()
+                    self._writer = None
+                    self._stats["evicted"] += 1
+            finally:
+                self._writer_lock.release()
+
+    def _checkout(self):
+        now = time.monotonic()
+        self._evict_idle(now)
+        with self._lock:
+            if self._idle:
+                self._stats["reused"] += 1
+                return self._idle.pop()[0]
+            self._open_readers += 1
+            self._stats["opened"] += 1
+        try:
+            return connect_db(self.db_path)
+        except Exception:
+            with self._lock:
+                self._open_readers -= 1
+            raise
+
+    def _checkin(self, conn):
+        if conn.in_transaction:
+            conn.rollback()
+        with self._lock:
+            self._idle.append((conn, time.monotonic()))
+
+    @contextmanager
+    def reader(self):
+        """Borrow a read-only connection, blocking while all `size` readers are busy"""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._stats["waits"] += 1
+            self._slots.acquire()
+        try:
+            conn = self._checkout()
+            try:
+                yield conn
+            finally:
+                self._checkin(conn)
+        finally:
+            self._slots.release()
+
+    @contextmanager
+    def writer(self):
+        """Borrow the single write connection; commits on success, rolls back on error"""
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = connect_db_write(self.db_path)
+                self._stats["opened"] += 1
+            else:
+                self._stats["reused"] += 1
+            conn = self._writer
+            try:
+                yield conn
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            finally:
+                self._writer_last_used = time.monotonic()
+
+    def data_version(self) -> int:
+        """PRAGMA data_version from a dedicated connection; changes whenever any other connection commits"""
+        with self._monitor_lock:
+            if self._monitor is None:
+                self._monitor = connect_db(self.db_path)
+            return self._monitor.execute("PRAGMA data_version").fetchone()[0]
+
+    def version_token(self) -> str:
+        """Opaque token that changes on every committed write or schema change to the db file
+
+        data_version only counts within this process, so the token also changes
+        whenever the pool is reopened (e.g. the MCP server restarts), even if the
+        file did not change.
+        """
+        version = self.data_version()
+        with self._monitor_lock:
+            schema_version = self._monitor.execute("PRAGMA schema_version").fetchone()[0]
+        # created_at: pool yeniden açılırsa data_version sayacı baştan başlar, çakışmasın
+        return f"{int(self.created_at * 1000)}-{version}-{schema_version}"
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "db_path": self.db_path,
+                "size": self.size,
+                "idle_timeout": self.idle_timeout,
+                "open_readers": self._open_readers,
+                "idle_readers": len(self._idle),
+                "busy_readers": self._open_readers - len(self._idle),
+                "writer_open": self._writer is not None,
+                **self._stats,
+            }
+
+    def close(self):
+        with self._lock:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._open_readers -= len(idle)
+        for conn in idle:
+            conn.close()
+        with self._writer_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+        with self._monitor_lock:
+            if self._monitor is not None:
+                self._monitor.close()
+                self._monitor = None
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def configure_pools(size: int = DEFAULT_POOL_SIZE, idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+                    statement_cache_size: int = None):
+    """Set the size/idle timeout (and statement cache size) used for pools created from now on"""
+    pool_config["size"] = size
+    pool_config["idle_timeout"] = idle_timeout
+    if statement_cache_size is not None:
+        pool_config["statement_cache_size"] = statement_cache_size
+
+
+def get_pool(db_path: str) -> ConnectionPool:
+    """Return the pool for db_path, creating it on first use"""
+    key = os.path.abspath(db_path)
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                # Var olan dosyayı WAL'a al; olmayan dosyayı burada yaratma
+                if os.path.exists(key):
+                    init_database(key)
+                pool = ConnectionPool(key, pool_config["size"], pool_config["idle_timeout"])
+                _pools[key] = pool
+    return pool
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Stats for every pool opened so far"""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return {
+        "pools": [p.stats() for p in pools],
+        "count": len(pools),
+        "pragmas": dict(pragma_config),
+        "busy_retries": retry_stats["retries"],
+    }
+
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for p in pools:
+        p.close()
+
+
+_executor = None
+_executor_workers = DEFAULT_DB_WORKERS
+
+
+def configure_executor(max_workers: int = DEFAULT_DB_WORKERS):
+    """Set the number of worker threads used by run_db (replaces any running executor)"""
+    global _executor, _executor_workers
+    old = _executor
+    _executor_workers = max_workers
+    _executor = None
+    if old is not None:
+        old.shutdown(wait=False)
+
+
+def get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=_executor_workers, thread_name_prefix="sqlite")
+    return _executor
+
+
+async def run_db(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking SQLite function on the bounded worker pool so the event loop stays free"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_executor(), functools.partial(func, *args, **kwargs))
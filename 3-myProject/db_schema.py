@@ -0,0 +1,112 @@
+import os
+import threading
+from typing import Dict, Any, List
+
+
+def quote_identifier(name: str) -> str:
+    """Quote a table/column name for SQL ("a""b" style)"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+class SchemaCache:
+    """Tables and their columns per db file, reloaded only when PRAGMA schema_version changes"""
+
+    def __init__(self):
+        self._schemas = {}  # db_path -> (schema_version, {table: [columns]})
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "reloads": 0}
+
+    def tables(self, conn, db_path: str) -> Dict[str, List[str]]:
+        # schema_version db başlığından okunur; sqlite_master taramasından çok daha ucuz
+        version = conn.execute("PRAGMA schema_version").fetchone()[0]
+        key = os.path.abspath(db_path)
+        with self._lock:
+            cached = self._schemas.get(key)
+            if cached is not None and cached[0] == version:
+                self._stats["hits"] += 1
+                return cached[1]
+
+        tables = {}
+        # sqlite_stat1 gibi iç tablolar (ANALYZE) listelenmez
+        names = conn.execute(
+            "SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite\\_%' ESCAPE '\\'"
+        ).fetchall()
+        for (name,) in names:
+            info = conn.execute(f"PRAGMA table_info({quote_identifier(name)})").fetchall()
+            tables[name] = [row[1] for row in info]
+
+        with self._lock:
+            self._schemas[key] = (version, tables)
+            self._stats["reloads"] += 1
+        return tables
+
+    def validate_table(self, conn, db_path: str, table_name: str) -> List[str]:
+        """Return the columns of table_name, or raise ValueError if it is not in the schema"""
+        columns = self.tables(conn, db_path).get(table_name)
+        if columns is None:
+            raise ValueError(f"Unknown table '{table_name}'")
+        return columns
+
+    def validate_columns(self, conn, db_path: str, table_name: str, columns: List[str]):
+        known = self.validate_table(conn, db_path, table_name)
+        unknown = [col for col in columns if col not in known]
+        if unknown:
+            raise ValueError(f"Unknown column(s) in {table_name}: {', '.join(unknown)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"databases": len(self._schemas), **self._stats}
+
+
+def _existing_indexes(conn, table_name: str):
+    cur = conn.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name = ?",
+        (table_name,)
+    )
+    return {row[0] for row in cur.fetchall()}
+
+
+def ensure_indexes(conn, table_name: str, unique_item_name: bool = False) -> Dict[str, Any]:
+    """Create the item_name / in_stock indexes the tools rely on (idempotent)"""
+    columns = {row[1] for row in conn.execute(f"PRAGMA table_info({quote_identifier(table_name)})").fetchall()}
+    if not columns:
+        raise ValueError(f"Table '{table_name}' not found")
+
+    before = _existing_indexes(conn, table_name)
+    wanted = []
+
+    table = quote_identifier(table_name)
+
+    def index(name: str, column: str, unique: bool = False):
+        sql = (f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS "
+               f"{quote_identifier(name)} ON {table}({quote_identifier(column)})")
+        return name, sql
+
+    # delete_item / update_item item_name ile arıyor
+    if "item_name" in columns:
+        if unique_item_name:
+            # Aynı isim iki kez varsa burada IntegrityError alınır
+            wanted.append(index(f"uq_{table_name}_item_name", "item_name", unique=True))
+        else:
+            wanted.append(index(f"idx_{table_name}_item_name", "item_name"))
+
+    # get_in_stock / get_out_of_stock in_stock ile filtreliyor
+    if "in_stock" in columns:
+        wanted.append(index(f"idx_{table_name}_in_stock", "in_stock"))
+
+    for _, sql in wanted:
+        conn.execute(sql)
+
+    # UNIQUE varken düz item_name index'i gereksiz
+    if unique_item_name and f"idx_{table_name}_item_name" in before:
+        conn.execute(f"DROP INDEX IF EXISTS {quote_identifier(f'idx_{table_name}_item_name')}")
+
+    created = [name for name, _ in wanted if name not in before]
+    if created:
+        conn.execute(f"ANALYZE {table}")
+
+    return {
+        "table": table_name,
+        "indexes": sorted(_existing_indexes(conn, table_name)),
+        "created": created,
+    }
@@ -0,0 +1,327 @@
+import asyncio
+import json
+import re
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Sorguda db/tablo adı yoksa kullanılacak varsayılanlar
+DEFAULT_DB_PATH = "kitchen.db"
+DEFAULT_TABLE = "materials"
+
+DB_RE = re.compile(r"([\w\-./]+\.db)\b", re.IGNORECASE)
+# Tablo adından önceki kelime de yakalanır: "bread and butter table" gibi çok kelimeli adlar belirsizdir
+TABLE_RE = re.compile(r"(?:(\S+)\s+)?\b(\w+)\s+(?:table|tablosu\w*|tablo\w*)\b", re.IGNORECASE)
+TABLE_STOPWORDS = {"the", "a", "this", "that", "your", "my", "all", "and", "bu", "şu", "içindeki", "ve", "tüm", "bütün"}
+# Tablo adının önünde olabilecek kelimeler; başka bir kelime adın bir parçası olabilir
+TABLE_LEADING_WORDS = (TABLE_STOPWORDS - {"and", "ve"}) | {
+    "show", "read", "display", "list", "me", "from", "in", "inside", "of", "on", "at", "for",
+    "göster", "oku", "listele", "içinde",
+}
+
+# Her niyet için İngilizce + Türkçe kalıplar. Sorgu tam olarak BİR niyete uymalı.
+# Sadece okuma: yazma araçları her zaman ajandan geçer
+INTENT_PATTERNS = {
+    "list_tables": [
+        r"\b(list|show)\b.*\btables\b",
+        r"\btablolar\w*\b.*\b(listele|göster|neler)\w*",
+    ],
+    "read_table": [
+        r"\b(read|show|display)\b.*\b\w+\s+table\b(?!s)",
+        r"\btablo(?!lar)\w*\b.*\b(oku|göster)\w*",
+    ],
+    "get_out_of_stock": [
+        r"\bout[\s-]+of[\s-]+stock\b",
+        r"\bstokta\s+(olmayan|yok)\w*",
+        r"\btüken\w*",
+    ],
+    "get_in_stock": [
+        r"(?<!of )(?<!of-)\bin[\s-]+stock\b",
+        r"\bstokta\s+(olan|var|bulunan)\w*",
+    ],
+}
+COMPILED_PATTERNS = {
+    intent: [re.compile(p, re.IGNORECASE) for p in patterns]
+    for intent, patterns in INTENT_PATTERNS.items()
+}
+
+# Bir niyete uysa bile şablonla cevaplanamayan sorgular: bunlar ajana gider
+REFUSE_PATTERNS = [
+    # Olumsuzluk: "don't show ...", "stokta olanları gösterme"
+    r"\b(don'?t|do\s+not|doesn'?t|not|never|no|without|except|hariç|değil\w*)\b",
+    r"\b(göster|listele|oku|sil|ekle|güncelle|değiştir)m[ae]\w*",
+    # Evet/hayır ve varsayım soruları: "Is Oklava in stock?", "what if ...", "Oklava var mı?"
+    r"^\s*(is|are|does|do|did|has|have|should|will)\b",
+    r"\b(should|what\s+if|what\s+happens)\b",
+    r"\bm[ıiuü](s[ıiuü]n|d[ıiuü]r)?\b",
+    # Sayım: summarize_inventory'nin işi
+    r"\b(how\s+many|how\s+much|count|number\s+of|total|kaç|toplam)\b",
+    # Araçların desteklemediği sıralama, filtre ve tek ürün sorguları
+    r"\b(sort\w*|order(ed)?\s+by|top|limit|first|last|where|only|than|above|below|between|lowest|highest|most|least|"
+    r"quantity|item_name|sırala\w*|fazla|az|en|ilk|son|sadece|miktar\w*)\b",
+]
+COMPILED_REFUSE = [re.compile(p, re.IGNORECASE) for p in REFUSE_PATTERNS]
+
+# Niyet kalıbı, tablo ve db adı dışında sorguda sadece bunlar olabilir. Başka bir kelime
+# ("spoons", "kaşıklar") bir filtre demektir: şablon cevap tüm tabloyu döndürür, ajana bırak
+FILLER_RE = re.compile(
+    r"(items?|products?|things|rows?|contents?|entries|everything|"
+    r"the|a|an|all|me|us|my|our|your|this|that|these|those|which|what|what's|are|is|there|currently|now|"
+    r"can|could|would|you|please|give|get|bring|tell|see|let|"
+    r"list|show|read|display|tables?|stock|in|out|of|from|inside|at|on|for|database|db|"
+    r"ürün\w*|malzeme\w*|tablo\w*|stok\w*|olan\w*|olmayan\w*|var|yok|bulunan\w*|tüken\w*|"
+    r"listele\w*|göster\w*|oku\w*|getir\w*|neler\w*|hangi\w*|bana|lütfen|tüm|bütün|hepsi\w*|içinde\w*|bu|şu)",
+    re.IGNORECASE)
+WORD_RE = re.compile(r"[\w']+")
+
+READ_ONLY_INTENTS = {"list_tables", "read_table", "get_out_of_stock", "get_in_stock"}
+
+# Çok parçalı sorguları bağlaçlardan böl ("... and ...", "..., ...", "... ve ...")
+SPLIT_RE = re.compile(r"\s*(?:[,;]|\band\b|\balso\b|\bthen\b|\bplus\b|\bve\b|\bayrıca\b|\bsonra\b)\s*", re.IGNORECASE)
+WRITE_WORDS_RE = re.compile(r"\b(add|insert|remove|delete|update|modify|rename|ekle\w*|sil\w*|güncelle\w*|değiştir\w*)\b",
+                            re.IGNORECASE)
+
+
+def _table_name(text: str, default_table: str) -> Optional[str]:
+    """Table named in the query (default_table if none); None when the name is ambiguous"""
+    match = TABLE_RE.search(text)
+    if not match:
+        return default_table
+    previous, name = match.group(1), match.group(2)
+    if name.lower() in TABLE_STOPWORDS:
+        return default_table
+    if previous:
+        previous = previous.strip(",;:'\"").lower()
+        if previous not in TABLE_LEADING_WORDS and not previous.endswith(".db"):
+            return None
+    return name
+
+
+def _only_filler(text: str, table_name: str = None) -> bool:
+    """True when every word of the query besides the db path and the table name is filler"""
+    for word in WORD_RE.findall(DB_RE.sub(" ", text)):
+        word = word.strip("'").lower()
+        if word and word != (table_name or "").lower() and not FILLER_RE.fullmatch(word):
+            return False
+    return True
+
+
+def match_intent(query: str, default_db: str = DEFAULT_DB_PATH, default_table: str = DEFAULT_TABLE) -> Optional[Dict[str, Any]]:
+    """Map a read-only query to {"intent", "tool", "args"} when it is unambiguous; otherwise None"""
+    text = query.strip()
+    if WRITE_WORDS_RE.search(text) or any(p.search(text) for p in COMPILED_REFUSE):
+        return None
+    matched = {intent for intent, patterns in COMPILED_PATTERNS.items() if any(p.search(text) for p in patterns)}
+    if not matched:
+        return None
+
+    # "show ... materials table" her niyetle birlikte eşleşir; daha özel olan kazanır.
+    # Birden fazla özel niyet (ör. "in stock and out of stock") belirsizdir: ajana bırak.
+    # list_tables tek tablo içermez: "show tables and read materials table" de iki soru
+    specific = matched - {"read_table"}
+    if len(specific) > 1 or matched >= {"list_tables", "read_table"}:
+        return None
+    intent = specific.pop() if specific else "read_table"
+
+    db_match = DB_RE.search(text)
+    db_path = db_match.group(1) if db_match else default_db
+    args = {"db_path": db_path}
+    if intent != "list_tables":
+        table_name = _table_name(text, default_table)
+        if table_name is None:
+            return None
+        args["table_name"] = table_name
+    if not _only_filler(text, args.get("table_name")):
+        return None
+    return {"intent": intent, "tool": intent, "args": args}
+
+
+def split_query(query: str) -> List[str]:
+    """Split a multi-part question on conjunctions and commas; quoted values are never split"""
+    if "'" in query or '"' in query:
+        return [query.strip()]
+    return [part for part in SPLIT_RE.split(query.strip()) if part]
+
+
+def plan_parallel(query: str, default_db: str = DEFAULT_DB_PATH, default_table: str = DEFAULT_TABLE) -> Optional[Dict[str, Any]]:
+    """Independent read-only tool calls for a multi-part question: {"calls": [...], "unmatched": [...]}
+
+    Returns None unless there are at least two distinct calls, or one call next to parts only the
+    agent can answer. Anything that looks like a write leaves the whole question to the agent,
+    since writes and reads must then run in order.
+    """
+    if WRITE_WORDS_RE.search(query):
+        return None
+    parts = split_query(query)
+    if len(parts) < 2:
+        return None
+
+    # Sorgunun herhangi bir yerinde geçen db/tablo adı tüm parçalar için geçerli
+    db_match = DB_RE.search(query)
+    db_path = db_match.group(1) if db_match else default_db
+    table_name = _table_name(query, default_table)
+    if table_name is None:
+        return None
+
+    calls, unmatched, seen = [], [], set()
+    for part in parts:
+        match = match_intent(part, db_path, table_name)
+        if match is None or match["intent"] not in READ_ONLY_INTENTS:
+            # Sadece "items", "please" gibi dolgu kelimelerinden oluşan artıklar bir soru değil;
+            # "spoons" gibi bir filtre ise ajana gitmeli
+            if not _only_filler(part, table_name):
+                unmatched.append(part)
+            continue
+        key = (match["tool"], json.dumps(match["args"], sort_keys=True))
+        if key not in seen:
+            seen.add(key)
+            calls.append(match)
+    if not calls or (len(calls) < 2 and not unmatched):
+        return None
+    return {"calls": calls, "unmatched": unmatched}
+
+
+def parse_tool_result(result: Any) -> Dict[str, Any]:
+    """Turn an MCP CallToolResult into the dict the tool returned"""
+    for item in getattr(result, "content", None) or []:
+        text = getattr(item, "text", None)
+        if text:
+            try:
+                return json.loads(text)
+            except json.JSONDecodeError:
+                return {"text": text}
+    if isinstance(result, dict):
+        return result
+    return {"text": str(result)}
+
+
+def _markdown_table(columns, rows) -> str:
+    if not rows:
+        return "_(no rows)_"
+    columns = columns or list(rows[0].keys())
+    lines = [
+        "| " + " | ".join(columns) + " |",
+        "|" + "|".join("---" for _ in columns) + "|",
+    ]
+    for row in rows:
+        lines.append("| " + " | ".join(str(row.get(c, "")) for c in columns) + " |")
+    return "\n".join(lines)
+
+
+def format_response(intent: str, args: Dict[str, Any], data: Dict[str, Any]) -> str:
+    """Render a tool result with the same response formats DB_INSIGHT_PROMPT asks the LLM for"""
+    if "error" in data:
+        return f"❌ Error: {data['error']}"
+    if data.get("success") is False:
+        return f"❌ {data.get('message', 'Operation failed')}"
+
+    header = f"📘 Database: {args['db_path']}"
+    if intent == "list_tables":
+        tables = "\n".join(f"- {t}" for t in data.get("tables", []))
+        return f"{header}\n📋 Tables:\n{tables}\n\n🔢 Total: {data.get('count', 0)} tables"
+
+    header += f"\n📋 Table: {args['table_name']}"
+    more = "\n➡️ More rows available (next_cursor: {})".format(data["next_cursor"]) if data.get("next_cursor") else ""
+    if intent == "read_table":
+        return (f"{header}\n📊 Columns: {', '.join(data.get('columns', []))}\n\n"
+                f"{_markdown_table(data.get('columns'), data.get('rows', []))}\n\n"
+                f"🔢 Showing: {data.get('count', 0)} rows{more}")
+    if intent == "get_out_of_stock":
+        return (f"{header}\n⚠️ Out of Stock Items (ALL items with in_stock=0):\n\n"
+                f"{_markdown_table(data.get('columns'), data.get('out_of_stock_items', []))}\n\n"
+                f"🔢 Total out of stock: {data.get('total_in_db', 0)} items{more}")
+    if intent == "get_in_stock":
+        return (f"{header}\n✅ In Stock Items (ALL items with in_stock=1):\n\n"
+                f"{_markdown_table(data.get('columns'), data.get('in_stock_items', []))}\n\n"
+                f"🔢 Total in stock: {data.get('total_in_db', 0)} items{more}")
+    return json.dumps(data, ensure_ascii=False)
+
+
+class FastPathRouter:
+    """Answers canned requests with a direct MCP tool call and falls back to the agent otherwise"""
+
+    def __init__(self, call_tool: Callable[[str, Dict[str, Any]], Awaitable[Any]],
+                 default_db: str = DEFAULT_DB_PATH, default_table: str = DEFAULT_TABLE):
+        self.call_tool = call_tool
+        self.default_db = default_db
+        self.default_table = default_table
+        self._stats = {"hits": 0, "misses": 0, "errors": 0, "fast_time": 0.0, "agent_time": 0.0, "agent_calls": 0,
+                       "parallel_hits": 0, "parallel_prefetches": 0, "parallel_calls": 0, "parallel_time": 0.0}
+
+    async def try_handle(self, query: str) -> Optional[str]:
+        """Return a templated answer, or None when the agent should handle the query"""
+        match = match_intent(query, self.default_db, self.default_table)
+        if match is None:
+            self._stats["misses"] += 1
+            return None
+
+        start = time.perf_counter()
+        try:
+            result = await self.call_tool(match["tool"], match["args"])
+        except Exception as e:
+            # Araç çağrısı patladıysa ajan denesin
+            print(f"⚠️ Fast path failed for {match['tool']}: {e}")
+            self._stats["errors"] += 1
+            self._stats["misses"] += 1
+            return None
+        response = format_response(match["intent"], match["args"], parse_tool_result(result))
+        self._stats["hits"] += 1
+        self._stats["fast_time"] += time.perf_counter() - start
+        return response
+
+    async def run_parallel(self, query: str) -> Optional[Dict[str, Any]]:
+        """Run the independent read-only calls of a multi-part question concurrently
+
+        Returns None when there is no such plan (or a call failed). Otherwise returns the parsed
+        observations, plus a merged templated answer when every part of the question was covered.
+        """
+        plan = plan_parallel(query, self.default_db, self.default_table)
+        if plan is None:
+            return None
+
+        start = time.perf_counter()
+        results = await asyncio.gather(*(self.call_tool(c["tool"], c["args"]) for c in plan["calls"]),
+                                       return_exceptions=True)
+        if any(isinstance(r, BaseException) for r in results):
+            print(f"⚠️ Parallel tool calls failed: {[repr(r) for r in results if isinstance(r, BaseException)]}")
+            self._stats["errors"] += 1
+            return None
+        observations = [parse_tool_result(r) for r in results]
+        elapsed = time.perf_counter() - start
+        self._stats["parallel_calls"] += len(plan["calls"])
+        self._stats["parallel_time"] += elapsed
+
+        response = None
+        if not plan["unmatched"]:
+            response = "\n\n".join(format_response(c["intent"], c["args"], data)
+                                    for c, data in zip(plan["calls"], observations))
+            self._stats["parallel_hits"] += 1
+        else:
+            self._stats["parallel_prefetches"] += 1
+        return {"response": response, "calls": plan["calls"], "observations": observations,
+                "unmatched": plan["unmatched"], "elapsed": elapsed}
+
+    def record_agent_time(self, seconds: float):
+        """Feed agent latencies in so the time saved by fast-path hits can be estimated"""
+        self._stats["agent_calls"] += 1
+        self._stats["agent_time"] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        s = self._stats
+        total = s["hits"] + s["misses"]
+        avg_fast = s["fast_time"] / s["hits"] if s["hits"] else 0.0
+        avg_agent = s["agent_time"] / s["agent_calls"] if s["agent_calls"] else None
+        saved = s["hits"] * (avg_agent - avg_fast) if avg_agent is not None else None
+        batches = s["parallel_hits"] + s["parallel_prefetches"]
+        return {
+            "hits": s["hits"],
+            "misses": s["misses"],
+            "errors": s["errors"],
+            "hit_rate": round(s["hits"] / total, 3) if total else 0.0,
+            "avg_fast_path_ms": round(avg_fast * 1000, 2),
+            "avg_agent_ms": round(avg_agent * 1000, 2) if avg_agent is not None else None,
+            "estimated_saved_ms": round(saved * 1000, 2) if saved is not None else None,
+            "parallel_hits": s["parallel_hits"],
+            "parallel_prefetches": s["parallel_prefetches"],
+            "parallel_calls": s["parallel_calls"],
+            "avg_parallel_batch_ms": round(s["parallel_time"] / batches * 1000, 2) if batches else 0.0,
+        }
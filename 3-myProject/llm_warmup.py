@@ -0,0 +1,97 @@
+import re
+import time
+from typing import Any, Dict, List, Optional
+
+DEFAULT_KEEP_ALIVE = "30m"
+DEFAULT_NUM_CTX = 8192
+WARMUP_QUERY = "list the tables"
+
+_DURATION_RE = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*(ms|s|m|h)?\s*$")
+_UNITS = {"ms": 0.001, "s": 1, "m": 60, "h": 3600, None: 1}
+
+
+def parse_keep_alive(value) -> float:
+    """Ollama keep_alive ("30m", "1h", "300", -1, 0) in seconds; negative means the model never unloads"""
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        match = _DURATION_RE.match(str(value))
+        if not match:
+            raise ValueError(f"Invalid keep_alive: {value!r}")
+        seconds = float(match.group(1)) * _UNITS[match.group(2)]
+    return float("inf") if seconds < 0 else seconds
+
+
+def keep_alive_value(value: str):
+    """Env string -> what Ollama expects: plain numbers as int seconds, durations ("30m") unchanged"""
+    try:
+        return int(value)
+    except ValueError:
+        return value
+
+
+def _ms(ns) -> Optional[float]:
+    return round(ns / 1e6, 2) if ns else None
+
+
+def call_timings(raw: Dict[str, Any], wall: float) -> Dict[str, Any]:
+    """Load/prefill/decode split of one Ollama call from its raw response"""
+    return {
+        "wall_ms": round(wall * 1000, 2),
+        "load_ms": _ms(raw.get("load_duration")),
+        "prompt_tokens": raw.get("prompt_eval_count"),
+        "prefill_ms": _ms(raw.get("prompt_eval_duration")),
+        "decode_ms": _ms(raw.get("eval_duration")),
+    }
+
+
+async def warmup(llm, messages: List[Any]) -> Dict[str, Any]:
+    """Send the agent's first-call prompt twice: the first call loads the model and fills the KV cache,
+    the second shows what a request pays once the static prefix is cached"""
+    runs = []
+    for _ in range(2):
+        start = time.perf_counter()
+        response = await llm.achat(messages)
+        runs.append(call_timings(dict(response.raw or {}), time.perf_counter() - start))
+    cold, warm = runs
+    return {"cold": cold, "warm": warm, "saved_ms": round(cold["wall_ms"] - warm["wall_ms"], 2)}
+
+
+def format_warmup(result: Dict[str, Any]) -> str:
+    cold, warm = result["cold"], result["warm"]
+    return (f"cold {cold['wall_ms']}ms (load {cold['load_ms']}ms, prefill {cold['prefill_ms']}ms "
+            f"for {cold['prompt_tokens']} tokens) -> warm {warm['wall_ms']}ms (prefill {warm['prefill_ms']}ms "
+            f"for {warm['prompt_tokens']} tokens)")
+
+
+class ColdWarmTracker:
+    """Classifies agent runs as cold (model probably unloaded after keep_alive) or warm and keeps latency per class"""
+
+    def __init__(self, keep_alive_seconds: float):
+        self.keep_alive_seconds = keep_alive_seconds
+        self._last_used = None
+        self._stats = {"cold": {"runs": 0, "time": 0.0}, "warm": {"runs": 0, "time": 0.0}}
+        self.warmup = None
+
+    def start(self) -> str:
+        now = time.monotonic()
+        idle = None if self._last_used is None else now - self._last_used
+        self._last_used = now
+        return "cold" if idle is None or idle > self.keep_alive_seconds else "warm"
+
+    def touch(self):
+        """The model was just used outside an agent run (e.g. warmup)"""
+        self._last_used = time.monotonic()
+
+    def finish(self, kind: str, seconds: float):
+        self._last_used = time.monotonic()
+        self._stats[kind]["runs"] += 1
+        self._stats[kind]["time"] += seconds
+
+    def stats(self) -> Dict[str, Any]:
+        keep_alive = None if self.keep_alive_seconds == float("inf") else self.keep_alive_seconds
+        result = {"keep_alive_s": keep_alive, "warmup": self.warmup}
+        for kind, s in self._stats.items():
+            result[f"{kind}_runs"] = s["runs"]
+            result[f"avg_{kind}_ms"] = round(s["time"] / s["runs"] * 1000, 2) if s["runs"] else None
+        return result
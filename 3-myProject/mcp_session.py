@@ -0,0 +1,220 @@
+import asyncio
+import inspect
+import random
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import anyio
+from mcp import ClientSession, types
+from mcp.client.sse import sse_client
+from mcp.shared.exceptions import McpError
+
+DEFAULT_HEARTBEAT_INTERVAL = 15.0  # saniye
+DEFAULT_CALL_TIMEOUT = 60.0
+DEFAULT_CONNECT_TIMEOUT = 10.0
+DEFAULT_MAX_BACKOFF = 30.0
+
+_TRANSPORT_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream, ConnectionError, OSError)
+
+
+class MCPUnavailableError(Exception):
+    """Raised when no MCP session could be established within connect_timeout"""
+
+
+def _is_connection_error(e: Exception) -> bool:
+    if isinstance(e, McpError):
+        return e.error.code == types.CONNECTION_CLOSED
+    return isinstance(e, _TRANSPORT_ERRORS)
+
+
+class MCPSessionManager:
+    """One long-lived MCP session over SSE shared by every caller
+
+    A background task owns the connection: it pings the server every
+    `heartbeat_interval`, reconnects with exponential backoff when the
+    connection drops, and keeps the tools/list result cached (reloaded on
+    connect and on notifications/tools/list_changed). Concurrent call_tool()
+    calls are multiplexed over the same session by request id. Exposes
+    call_tool/list_tools like BasicMCPClient, so McpToolSpec can use it.
+    """
+
+    def __init__(self, url: str, heartbeat_interval: float = DEFAULT_HEARTBEAT_INTERVAL,
+                 call_timeout: float = DEFAULT_CALL_TIMEOUT, connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 max_backoff: float = DEFAULT_MAX_BACKOFF, retry_tools: Iterable[str] = (),
+                 on_tools_changed: Callable[[types.ListToolsResult], Any] = None, call_stats=None):
+        self.url = url
+        self.heartbeat_interval = heartbeat_interval
+        self.call_timeout = call_timeout
+        self.connect_timeout = connect_timeout
+        self.max_backoff = max_backoff
+        # Bağlantı koptuğunda bir kez yeniden denenebilecek (yan etkisiz) araçlar
+        self.retry_tools = set(retry_tools)
+        self.on_tools_changed = on_tools_changed
+        self.call_stats = call_stats
+
+        self._session: Optional[ClientSession] = None
+        self._ready = asyncio.Event()
+        self._lost = asyncio.Event()
+        self._runner: Optional[asyncio.Task] = None
+        self._closing = False
+        self._tools: Optional[types.ListToolsResult] = None
+        self._in_flight = 0
+        self._stats = {"connects": 0, "disconnects": 0, "reconnect_attempts": 0, "calls": 0, "retries": 0,
+                       "pings": 0, "last_ping_ms": None, "tool_refreshes": 0, "connected_since": None}
+
+    async def start(self, wait: bool = True):
+        """Start the connection task; with wait=True block until the first session is up"""
+        if self._runner is None or self._runner.done():
+            self._closing = False
+            self._runner = asyncio.create_task(self._run())
+        if wait:
+            await self._wait_ready()
+
+    async def close(self):
+        self._closing = True
+        if self._runner is not None:
+            self._runner.cancel()
+            try:
+                await self._runner
+            except (asyncio.CancelledError, Exception):
+                pass
+            self._runner = None
+
+    async def _run(self):
+        attempt = 0
+        while not self._closing:
+            try:
+                async with sse_client(self.url, timeout=self.connect_timeout) as streams:
+                    async with ClientSession(*streams, message_handler=self._on_message) as session:
+                        await asyncio.wait_for(session.initialize(), self.connect_timeout)
+                        await self._load_tools(session)
+                        self._session = session
+                        self._lost.clear()
+                        self._ready.set()
+                        self._stats["connects"] += 1
+                        self._stats["connected_since"] = time.time()
+                        if attempt:
+                            print(f"🔌 Reconnected to MCP server at {self.url}")
+                        attempt = 0
+                        await self._heartbeat(session)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                if self._session is not None or attempt == 0:
+                    print(f"⚠️ MCP connection to {self.url} lost: {e!r}")
+            finally:
+                if self._session is not None:
+                    self._stats["disconnects"] += 1
+                self._ready.clear()
+                self._session = None
+                self._stats["connected_since"] = None
+            if self._closing:
+                break
+            attempt += 1
+            self._stats["reconnect_attempts"] += 1
+            delay = min(self.max_backoff, 0.5 * 2 ** (attempt - 1)) * random.uniform(0.5, 1.0)
+            await asyncio.sleep(delay)
+
+    async def _heartbeat(self, session: ClientSession):
+        """Ping until the server stops answering or a caller reports a broken transport"""
+        while True:
+            try:
+                await asyncio.wait_for(self._lost.wait(), self.heartbeat_interval)
+                raise ConnectionError("transport error reported by a tool call")
+            except asyncio.TimeoutError:
+                pass
+            start = time.perf_counter()
+            await asyncio.wait_for(session.send_ping(), self.call_timeout)
+            self._stats["pings"] += 1
+            self._stats["last_ping_ms"] = round((time.perf_counter() - start) * 1000, 2)
+
+    async def _on_message(self, message):
+        if isinstance(message, Exception):
+            if self._session is not None:
+                self._report_lost(self._session)
+            return
+        notification = getattr(message, "root", None)
+        if isinstance(notification, types.ToolListChangedNotification) and self._session is not None:
+            # Mesaj işleyicisi içinde istek beklenirse oturum kilitlenir; ayrı task'te yükle
+            asyncio.create_task(self._reload_tools(self._session))
+
+    async def _reload_tools(self, session: ClientSession):
+        try:
+            await self._load_tools(session)
+        except Exception as e:
+            print(f"⚠️ Could not refresh MCP tool list: {e!r}")
+
+    async def _load_tools(self, session: ClientSession):
+        tools = await asyncio.wait_for(session.list_tools(), self.call_timeout)
+        changed = self._tools is not None and [t.model_dump() for t in tools.tools] != [t.model_dump() for t in self._tools.tools]
+        self._tools = tools
+        self._stats["tool_refreshes"] += 1
+        if changed and self.on_tools_changed is not None:
+            result = self.on_tools_changed(tools)
+            if inspect.isawaitable(result):
+                asyncio.create_task(result)
+
+    def _report_lost(self, session: ClientSession):
+        """Mark a session broken: callers wait for the next one while the heartbeat loop reconnects"""
+        if self._session is session:
+            self._ready.clear()
+            self._lost.set()
+
+    async def _wait_ready(self, failed: Optional[ClientSession] = None) -> ClientSession:
+        """The live session, waiting (up to connect_timeout) for one that is not `failed`"""
+        if self._runner is None or self._runner.done():
+            await self.start(wait=False)
+        deadline = time.monotonic() + self.connect_timeout
+        while True:
+            try:
+                await asyncio.wait_for(self._ready.wait(), max(0.0, deadline - time.monotonic()))
+            except asyncio.TimeoutError:
+                raise MCPUnavailableError(f"MCP server at {self.url} is unavailable")
+            session = self._session
+            if session is not None and session is not failed:
+                return session
+            # Bayrak hâlâ bozuk oturumdan kalma: yeni oturum kurulana kadar bekle
+            self._ready.clear()
+
+    async def list_tools(self) -> types.ListToolsResult:
+        """Cached tools/list result (loaded on connect, refreshed on tools/list_changed)"""
+        if self._tools is None:
+            await self._wait_ready()
+        return self._tools
+
+    async def call_tool(self, tool_name: str, arguments: Optional[dict] = None, progress_callback=None) -> types.CallToolResult:
+        attempts = 2 if tool_name in self.retry_tools else 1
+        start = time.perf_counter()
+        failed = True
+        try:
+            session = None
+            for attempt in range(attempts):
+                session = await self._wait_ready(failed=session)
+                self._in_flight += 1
+                self._stats["calls"] += 1
+                try:
+                    result = await asyncio.wait_for(
+                        session.call_tool(tool_name, arguments=arguments, progress_callback=progress_callback),
+                        self.call_timeout)
+                    failed = bool(result.isError)
+                    return result
+                except Exception as e:
+                    if not _is_connection_error(e):
+                        raise
+                    # Oturum bozuk: kalp atışı döngüsü yeniden bağlanır, tekrar deneme yeni oturumu bekler
+                    self._report_lost(session)
+                    if attempt + 1 >= attempts:
+                        raise
+                    self._stats["retries"] += 1
+                finally:
+                    self._in_flight -= 1
+        finally:
+            if self.call_stats is not None:
+                self.call_stats.record(tool_name, time.perf_counter() - start, error=failed)
+
+    def stats(self) -> Dict[str, Any]:
+        s = dict(self._stats)
+        s["connected"] = self._ready.is_set()
+        s["in_flight"] = self._in_flight
+        s["tools"] = len(self._tools.tools) if self._tools is not None else None
+        return s
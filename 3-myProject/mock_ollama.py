@@ -0,0 +1,177 @@
+"""
+Deterministic stand-in for Ollama, for benchmarking the agent pipeline offline.
+
+Speaks enough of the Ollama HTTP API for llama_index's Ollama LLM (/api/chat,
+streaming and not, plus /api/show, /api/tags, /api/version). Instead of a model
+it plays a fixed ReAct script: the first step picks a tool for the question
+(using the fast-path matcher), and once an Observation is in the conversation
+it answers with it. Latency is simulated: a one-off load time, prefill per
+prompt token and decode per generated token.
+
+    python mock_ollama.py --port 11435 --token_ms 20 --prefill_ms_per_token 0.5
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from call_stats import CallStats
+from fast_path import match_intent, DEFAULT_DB_PATH, DEFAULT_TABLE
+from prompt_builder import detect_intents, estimate_tokens, INTENTS
+
+DEFAULT_MODEL = "mock"
+
+
+class MockConfig:
+    def __init__(self, load_ms: float = 0.0, prefill_ms_per_token: float = 0.2, token_ms: float = 10.0,
+                 db_path: str = DEFAULT_DB_PATH, table_name: str = DEFAULT_TABLE, answer_chars: int = 300):
+        self.load_ms = load_ms
+        self.prefill_ms_per_token = prefill_ms_per_token
+        self.token_ms = token_ms
+        self.db_path = db_path
+        self.table_name = table_name
+        self.answer_chars = answer_chars
+
+
+def _is_observation(message: Dict[str, Any]) -> bool:
+    return message.get("role") in ("user", "tool") and str(message.get("content", "")).startswith("Observation:")
+
+
+def plan_reply(messages: List[Dict[str, Any]], config: MockConfig) -> str:
+    """Next ReAct step: an Action for a fresh question, the Answer once a tool result came back"""
+    if messages and _is_observation(messages[-1]):
+        observation = messages[-1]["content"][len("Observation:"):].strip()
+        return ("Thought: I can answer without using any more tools.\n"
+                f"Answer: {observation[:config.answer_chars]}")
+
+    question = next((m.get("content", "") for m in reversed(messages)
+                     if m.get("role") == "user" and not _is_observation(m)), "")
+    match = match_intent(question, config.db_path, config.table_name)
+    if match is not None:
+        tool, args = match["tool"], match["args"]
+    else:
+        intents = detect_intents(question)
+        tool = INTENTS[intents[0]][1][0] if intents else "list_tables"
+        args = {"db_path": config.db_path}
+        if tool != "list_tables":
+            args["table_name"] = config.table_name
+    return (f"Thought: The user wants {tool.replace('_', ' ')}. I need to use a tool.\n"
+            f"Action: {tool}\n"
+            f"Action Input: {json.dumps(args, ensure_ascii=False)}")
+
+
+def _tokens(text: str) -> List[str]:
+    """Split the reply into word-sized chunks; each one counts as a generated token"""
+    parts = text.split(" ")
+    return [p if i == len(parts) - 1 else p + " " for i, p in enumerate(parts)]
+
+
+def create_app(config: MockConfig) -> FastAPI:
+    app = FastAPI()
+    app.state.config = config
+    app.state.calls = CallStats()
+    app.state.loaded = False
+
+    def _now():
+        return datetime.now(timezone.utc).isoformat()
+
+    async def _prefill(messages) -> Dict[str, Any]:
+        load = 0.0
+        if not app.state.loaded:
+            load = config.load_ms / 1000
+            app.state.loaded = True
+        prompt_tokens = sum(estimate_tokens(str(m.get("content", ""))) for m in messages)
+        prefill = prompt_tokens * config.prefill_ms_per_token / 1000
+        await asyncio.sleep(load + prefill)
+        return {"load": load, "prompt_tokens": prompt_tokens, "prefill": prefill}
+
+    def _final(model: str, timing: Dict[str, Any], tokens: int, decode: float, content: str = "") -> Dict[str, Any]:
+        return {
+            "model": model,
+            "created_at": _now(),
+            "message": {"role": "assistant", "content": content},
+            "done": True,
+            "done_reason": "stop",
+            "total_duration": int((timing["load"] + timing["prefill"] + decode) * 1e9),
+            "load_duration": int(timing["load"] * 1e9),
+            "prompt_eval_count": timing["prompt_tokens"],
+            "prompt_eval_duration": int(timing["prefill"] * 1e9),
+            "eval_count": tokens,
+            "eval_duration": int(decode * 1e9),
+        }
+
+    @app.post("/api/chat")
+    async def chat(request: Request):
+        body = await request.json()
+        model = body.get("model", DEFAULT_MODEL)
+        messages = body.get("messages", [])
+        start = time.perf_counter()
+        reply = plan_reply(messages, config)
+        tokens = _tokens(reply)
+        limit = (body.get("options") or {}).get("num_predict")
+        if limit and limit > 0:
+            tokens = tokens[:limit]
+        decode = len(tokens) * config.token_ms / 1000
+
+        if not body.get("stream", True):
+            timing = await _prefill(messages)
+            await asyncio.sleep(decode)
+            app.state.calls.record(model, time.perf_counter() - start)
+            return JSONResponse(_final(model, timing, len(tokens), decode, "".join(tokens)))
+
+        async def stream():
+            timing = await _prefill(messages)
+            for token in tokens:
+                await asyncio.sleep(config.token_ms / 1000)
+                chunk = {"model": model, "created_at": _now(),
+                         "message": {"role": "assistant", "content": token}, "done": False}
+                yield json.dumps(chunk) + "\n"
+            app.state.calls.record(model, time.perf_counter() - start)
+            yield json.dumps(_final(model, timing, len(tokens), decode)) + "\n"
+
+        return StreamingResponse(stream(), media_type="application/x-ndjson")
+
+    @app.post("/api/show")
+    async def show(request: Request):
+        body = await request.json()
+        return {"modelfile": "", "parameters": "", "template": "", "details": {"family": "mock"},
+                "model_info": {"mock.context_length": 8192}, "modelinfo": {"mock.context_length": 8192},
+                "model": body.get("model", DEFAULT_MODEL)}
+
+    @app.get("/api/tags")
+    async def tags():
+        return {"models": [{"name": DEFAULT_MODEL, "model": DEFAULT_MODEL, "size": 0, "digest": "mock"}]}
+
+    @app.get("/api/version")
+    async def version():
+        return {"version": "0.0.0-mock"}
+
+    @app.get("/")
+    async def root():
+        return "Ollama is running"
+
+    @app.get("/mock/stats")
+    async def stats():
+        return app.state.calls.stats()
+
+    return app
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Deterministic mock of the Ollama API")
+    parser.add_argument("--port", type=int, default=11435)
+    parser.add_argument("--load_ms", type=float, default=0.0, help="Simulated model load time on the first call")
+    parser.add_argument("--prefill_ms_per_token", type=float, default=0.2)
+    parser.add_argument("--token_ms", type=float, default=10.0, help="Simulated decode time per generated token")
+    parser.add_argument("--db_path", type=str, default=DEFAULT_DB_PATH, help="db_path used in the scripted tool calls")
+    parser.add_argument("--table_name", type=str, default=DEFAULT_TABLE)
+    args = parser.parse_args()
+    config = MockConfig(args.load_ms, args.prefill_ms_per_token, args.token_ms, args.db_path, args.table_name)
+    uvicorn.run(create_app(config), host="127.0.0.1", port=args.port)
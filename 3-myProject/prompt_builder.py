@@ -0,0 +1,190 @@
+import re
+from typing import Any, Callable, Dict, List
+
+DEFAULT_TOKEN_BUDGET = 600
+
+# Ajanın ihtiyaç duymadığı yönetim araçları prompt'a yazılmaz (yine de çağrılabilirler)
+HIDDEN_TOOLS = {"cache_stats", "pool_stats", "ensure_indexes", "db_version", "stream_table"}
+
+# ReActAgent'ın varsayılan başlığı her aracın tam JSON şemasını ekler; bu sürüm sadece formatı anlatır,
+# araçlar PromptBuilder'ın kısa listesinden gelir ({context}). str.format ile doldurulur: süslü parantezler çift.
+# Sabit kısım başta, sorguya göre değişen kısım sonda: Ollama ortak öneki KV cache'ten tekrar kullanır.
+COMPACT_REACT_HEADER = """Tools: {tool_names}
+Work step by step in this format:
+Thought: what to do next
+Action: tool name
+Action Input: tool arguments as JSON, e.g. {{"db_path": "kitchen.db", "table_name": "materials"}}
+After each Observation take another Action, or finish with:
+Thought: I can answer without using any more tools.
+Answer: the final answer
+
+{context}
+"""
+
+CORE_RULES = """You manage SQLite inventory databases through tools.
+- Items are identified by item_name; in_stock is 0 (out of stock) or 1 (in stock).
+- Show every row a tool returns as a markdown table; never invent rows.
+- If a result has next_cursor, more rows exist: call the same tool with after_id=next_cursor when the user wants all of them.
+- For counts, totals or low stock use summarize_inventory; never count rows yourself.
+- For update_item pass only the fields the user wants to change; use new_item_name to rename.
+- If a tool returns an error or success=false, tell the user clearly."""
+
+_HEADER = "📘 Database: <db_path>\n📋 Table: <table_name>"
+_ITEM = "- ID / Name / Quantity / Stock Status (0=Out of Stock, 1=In Stock) / Updated At"
+
+RESPONSE_FORMATS = {
+    "list_tables": "📘 Database: <db_path>\n📋 Tables:\n- <table>\n🔢 Total: <count> tables",
+    "read_table": f"{_HEADER}\n📊 Columns: <columns>\n<markdown table>\n🔢 Showing: <count> rows",
+    "get_out_of_stock": f"{_HEADER}\n⚠️ Out of Stock Items:\n<markdown table>\n🔢 Total out of stock: <total_in_db> items",
+    "get_in_stock": f"{_HEADER}\n✅ In Stock Items:\n<markdown table>\n🔢 Total in stock: <total_in_db> items",
+    "summarize_inventory": f"{_HEADER}\n📊 Items: <item_count> (✅ <in_stock_count> in stock, ⚠️ <out_of_stock_count> out of stock)\n"
+                           "🔢 Total quantity: <total_quantity>\n<low_stock_items / groups as a markdown table, if any>",
+    "add_item": f"{_HEADER}\n✅ Item Added Successfully!\n📦 Item Details:\n{_ITEM}",
+    "delete_item": f"{_HEADER}\n🗑️ Item Deleted Successfully!\n📦 Deleted Item Details:\n{_ITEM}",
+    "update_item": f"{_HEADER}\n🔄 Item Updated Successfully!\n📦 Before Update:\n{_ITEM}\n📦 After Update:\n{_ITEM}",
+}
+
+# Niyet -> (anahtar kelimeler, ilgili araçlar). fast_path'ten farklı olarak birden çok niyet birlikte seçilebilir.
+INTENTS = {
+    "list_tables": (r"\btables\b|\btablolar", ["list_tables"]),
+    "read_table": (r"\b(read|show|display|list)\b|\b(oku|göster|listele)", ["read_table"]),
+    "get_out_of_stock": (r"\bout\s+of\s+stock\b|\bstokta\s+(olmayan|yok)|\btüken|\bbit(miş|en)\b",
+                         ["get_out_of_stock", "query_by_stock"]),
+    "get_in_stock": (r"(?<!out of )\bin\s+stock\b|\bstokta\s+(olan|var|bulunan)", ["get_in_stock", "query_by_stock"]),
+    "summarize_inventory": (r"\bhow\s+(many|much)\b|\b(total|count|sum|summary|summari[sz]e|low|running\s+out)\b|"
+                            r"\bkaç\b|\btoplam|\bözet|\baz\s+(kalan|kaldı)|\bsay(ı|ısı)\b",
+                            ["summarize_inventory", "query_by_stock"]),
+    "add_item": (r"\b(add|insert)\b|\bekle", ["add_item", "add_items"]),
+    "delete_item": (r"\b(remove|delete)\b|\bsil", ["delete_item", "delete_items"]),
+    "update_item": (r"\b(update|modify|rename|change|set)\b|\bgüncelle|\bdeğiştir", ["update_item", "update_items"]),
+}
+COMPILED_INTENTS = {intent: re.compile(pattern, re.IGNORECASE) for intent, (pattern, _) in INTENTS.items()}
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token); good enough to keep a prompt under a budget"""
+    return (len(text) + 3) // 4
+
+
+def detect_intents(query: str) -> List[str]:
+    """Intents mentioned in the query; the generic read_table intent is dropped when a more specific one matches"""
+    matched = [intent for intent, pattern in COMPILED_INTENTS.items() if pattern.search(query or "")]
+    if len(matched) > 1 and "read_table" in matched:
+        matched.remove("read_table")
+    return matched
+
+
+def _tool_spec(tool: Any):
+    """(name, description, JSON schema) from a llama_index tool or an MCP tools/list entry"""
+    metadata = getattr(tool, "metadata", None)
+    if metadata is not None:
+        return metadata.name, metadata.description or "", metadata.get_parameters_dict() or {}
+    if isinstance(tool, dict):
+        return tool["name"], tool.get("description") or "", tool.get("inputSchema") or {}
+    return tool.name, tool.description or "", tool.inputSchema or {}
+
+
+def tool_signature(tool: Any, with_description: bool = True) -> str:
+    """One line per tool, e.g. `read_table(db_path, table_name, limit=10, after_id?) - Read the given table`"""
+    name, description, schema = _tool_spec(tool)
+    properties = schema.get("properties", {})
+    required = set(schema.get("required", []))
+    params = []
+    for param, prop in properties.items():
+        if param in required:
+            params.append(param)
+        elif prop.get("default") is not None:
+            params.append(f"{param}={prop['default']!r}")
+        else:
+            params.append(f"{param}?")
+    line = f"- {name}({', '.join(params)})"
+    if with_description and description:
+        # Docstring'in ilk cümlesi yeterli
+        first = re.split(r"(?<=\.)\s|\n", description.strip(), maxsplit=1)[0].rstrip(".")
+        line += f" - {first}"
+    return line
+
+
+class PromptBuilder:
+    """Builds a per-query system prompt: core rules, the relevant tools and only the matching response formats
+
+    The core rules never change and always come first, so consecutive prompts share a cacheable prefix.
+    """
+
+    def __init__(self, tools: List[Any], token_budget: int = DEFAULT_TOKEN_BUDGET, default_db: str = None,
+                 count_tokens: Callable[[str], int] = estimate_tokens):
+        self.token_budget = token_budget
+        self.default_db = default_db
+        self.count_tokens = count_tokens
+        self.set_tools(tools)
+        self._stats = {"built": 0, "tokens": 0, "max_tokens": 0, "over_budget": 0, "trimmed": 0}
+
+    def set_tools(self, tools: List[Any]):
+        """Refresh the tool lines (e.g. after the MCP server's tool list changed)"""
+        self.tools = {}
+        for tool in tools:
+            name = _tool_spec(tool)[0]
+            if name not in HIDDEN_TOOLS:
+                self.tools[name] = tool
+
+    def _sections(self, intents: List[str]):
+        """Required sections and optional ones; each optional entry lists alternatives from most to least detailed"""
+        rules = CORE_RULES
+        if self.default_db:
+            rules += f"\n- Default database: {self.default_db}"
+
+        relevant = list(dict.fromkeys(t for intent in intents for t in INTENTS[intent][1] if t in self.tools))
+        others = [t for t in self.tools if t not in relevant]
+
+        required = [rules]
+        if relevant:
+            required.append("Tools:\n" + "\n".join(tool_signature(self.tools[t]) for t in relevant))
+        optional = [[f"Response format:\n{RESPONSE_FORMATS[i]}"] for i in intents if i in RESPONSE_FORMATS]
+        if others:
+            # Niyet anlaşılmadıysa tüm araçlar buraya düşer; tam imzalar sığmazsa en azından isimler
+            title = "Other tools" if relevant else "Tools"
+            optional.append([
+                f"{title}:\n" + "\n".join(tool_signature(self.tools[t]) for t in others),
+                f"{title}: " + ", ".join(others),
+            ])
+        return required, optional
+
+    def build(self, query: str = "") -> str:
+        """System prompt for one query, kept under token_budget by dropping or shortening optional sections"""
+        required, optional = self._sections(detect_intents(query))
+        parts = list(required)
+        used = self.count_tokens("\n\n".join(parts))
+        trimmed = False
+        for alternatives in optional:
+            for i, section in enumerate(alternatives):
+                cost = self.count_tokens(section) + 1
+                if used + cost <= self.token_budget:
+                    parts.append(section)
+                    used += cost
+                    trimmed |= i > 0
+                    break
+            else:
+                trimmed = True
+        prompt = "\n\n".join(parts)
+        tokens = self.count_tokens(prompt)
+
+        s = self._stats
+        s["built"] += 1
+        s["tokens"] += tokens
+        s["max_tokens"] = max(s["max_tokens"], tokens)
+        s["trimmed"] += trimmed
+        if tokens > self.token_budget:
+            s["over_budget"] += 1
+        return prompt
+
+    def stats(self) -> Dict[str, Any]:
+        s = self._stats
+        return {
+            "token_budget": self.token_budget,
+            "tools": len(self.tools),
+            "built": s["built"],
+            "avg_tokens": round(s["tokens"] / s["built"], 1) if s["built"] else 0,
+            "max_tokens": s["max_tokens"],
+            "trimmed": s["trimmed"],
+            "over_budget": s["over_budget"],
+        }
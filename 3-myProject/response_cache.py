@@ -0,0 +1,107 @@
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+DEFAULT_RESPONSE_CACHE_ENTRIES = 256
+
+_PUNCT_RE = re.compile(r"[^\w\s.=']+", re.UNICODE)
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace so trivial rephrasings share a key"""
+    text = query.replace("İ", "i").casefold()
+    text = _PUNCT_RE.sub(" ", text)
+    text = text.strip(" .")
+    return _SPACE_RE.sub(" ", text)
+
+
+class ResponseCache:
+    """LRU cache of final agent answers keyed by (normalized query, db version token)
+
+    Entries from an older db version are dropped as soon as a newer version is
+    seen, so any write made through the MCP server invalidates the whole cache.
+    The token also changes when the MCP server restarts, so a persisted cache
+    (path) only survives client restarts.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_RESPONSE_CACHE_ENTRIES, path: str = None):
+        self.max_entries = max_entries
+        self.path = path
+        self._entries = OrderedDict()  # normalized query -> (version, response)
+        self._version = None
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "stores": 0}
+
+    def _see_version(self, version: str):
+        if version != self._version:
+            self._stats["invalidations"] += len(self._entries)
+            self._entries.clear()
+            self._version = version
+
+    def get(self, query: str, version: str) -> Optional[str]:
+        key = normalize_query(query)
+        with self._lock:
+            self._see_version(version)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry[1]
+
+    def put(self, query: str, version: str, response: str):
+        if self.max_entries <= 0:
+            return
+        key = normalize_query(query)
+        with self._lock:
+            # Çalışma sırasında versiyon değiştiyse cevap eski veriye ait olabilir
+            if version != self._version:
+                return
+            self._entries[key] = (version, response)
+            self._entries.move_to_end(key)
+            self._stats["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def load(self):
+        """Load entries saved by save(); they are only served while the db version still matches"""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"⚠️ Could not load response cache {self.path}: {e}")
+            return
+        with self._lock:
+            self._version = data.get("version")
+            for key, response in data.get("entries", [])[-self.max_entries:]:
+                self._entries[key] = (self._version, response)
+
+    def save(self):
+        if not self.path:
+            return
+        with self._lock:
+            data = {"version": self._version, "entries": [[k, v[1]] for k, v in self._entries.items()]}
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, self.path)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "version": self._version,
+                "persistent": bool(self.path),
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                **self._stats,
+            }
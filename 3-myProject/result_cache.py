@@ -0,0 +1,101 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Tuple
+
+DEFAULT_CACHE_ENTRIES = 256
+DEFAULT_CACHE_TTL = 30.0  # saniye
+
+
+class ResultCache:
+    """LRU + TTL cache for read-only tool results, keyed by (db_path, tool, args)
+
+    Every entry remembers the db's data_version when it was stored; a lookup
+    with a different version drops all entries of that db (another connection
+    or process wrote to it). Mutating tools also invalidate their table directly.
+    """
+
+    def __init__(self, max_entries: int = DEFAULT_CACHE_ENTRIES, ttl: float = DEFAULT_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()   # key -> (value, expires_at, table)
+        self._versions = {}             # db_path -> son görülen data_version
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "expired": 0, "evictions": 0, "invalidations": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    @staticmethod
+    def make_key(db_path: str, tool: str, args) -> Tuple[str, str, str]:
+        return os.path.abspath(db_path), tool, json.dumps(args, sort_keys=True, default=str)
+
+    def _drop_db(self, db_path: str):
+        stale = [k for k in self._entries if k[0] == db_path]
+        for k in stale:
+            del self._entries[k]
+        self._stats["invalidations"] += len(stale)
+
+    def get(self, db_path: str, tool: str, args, version: int) -> Tuple[bool, Any]:
+        key = self.make_key(db_path, tool, args)
+        with self._lock:
+            if self._versions.get(key[0]) != version:
+                self._drop_db(key[0])
+                self._versions[key[0]] = version
+            entry = self._entries.get(key)
+            if entry is None:
+                self._stats["misses"] += 1
+                return False, None
+            value, expires_at, _ = entry
+            if time.monotonic() > expires_at:
+                del self._entries[key]
+                self._stats["expired"] += 1
+                self._stats["misses"] += 1
+                return False, None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return True, value
+
+    def put(self, db_path: str, tool: str, args, value: Any, version: int, table: str = None):
+        key = self.make_key(db_path, tool, args)
+        with self._lock:
+            # Sorgu çalışırken biri yazdıysa bu sonuç zaten eski; saklama
+            if self._versions.get(key[0]) != version:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl, table)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats["evictions"] += 1
+
+    def invalidate_table(self, db_path: str, table: str):
+        db_path = os.path.abspath(db_path)
+        with self._lock:
+            stale = [k for k, (_, _, t) in self._entries.items() if k[0] == db_path and t == table]
+            for k in stale:
+                del self._entries[k]
+            self._stats["invalidations"] += len(stale)
+
+    def invalidate_db(self, db_path: str):
+        with self._lock:
+            self._drop_db(os.path.abspath(db_path))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl": self.ttl,
+                "hit_rate": round(self._stats["hits"] / lookups, 3) if lookups else 0.0,
+                **self._stats,
+            }
@@ -1,175 +1,433 @@
 import argparse
-import sqlite3
-from typing import Dict, Any
-from mcp.server.fastmcp import FastMCP
+import json
+import os
+from typing import Dict, Any, List
+from mcp.server.fastmcp import FastMCP, Context
+from db_schema import SchemaCache, ensure_indexes as create_indexes, quote_identifier
+from result_cache import ResultCache, DEFAULT_CACHE_ENTRIES, DEFAULT_CACHE_TTL
+from db_pool import (
+    configure_pools, configure_executor, configure_pragmas, configure_retry, init_database,
+    get_pool, run_db, retry_on_busy, pool_stats as collect_pool_stats,
+    pragma_config, retry_config, pool_config, DEFAULT_POOL_SIZE, DEFAULT_IDLE_TIMEOUT, DEFAULT_DB_WORKERS,
+    HAS_RETURNING,
+)
 
 mcp = FastMCP("SQLiteReader", host="127.0.0.1", port=3002)
+result_cache = ResultCache()
+schema_cache = SchemaCache()
 
 
-def connect_db(db_path: str):
-    """ Connect database (read-only)"""
-    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
-    conn.row_factory = sqlite3.Row
-    return conn
+def _table(conn, db_path: str, table_name: str) -> str:
+    """Check table_name against the cached schema and return it quoted for SQL"""
+    schema_cache.validate_table(conn, db_path, table_name)
+    return quote_identifier(table_name)
 
-def connect_db_write(db_path: str):
-    """Connect database (write mode)"""
-    conn = sqlite3.connect(db_path)
-    conn.row_factory = sqlite3.Row
-    return conn
 
-@mcp.tool()
-async def list_tables(db_path: str) -> Dict[str, Any]:
-    """List all the tables in db """
+def _cached(func, db_path: str, *args) -> Dict[str, Any]:
+    """Serve a read-only tool from result_cache; args[0] is the table name when there is one"""
+    if not result_cache.enabled:
+        return func(db_path, *args)
+    # Versiyonu sorgudan ÖNCE oku: arada yazılırsa sonuç eski versiyonla etiketlenir ve atılır
     try:
-        with connect_db(db_path) as conn:
-            cur = conn.execute("SELECT name FROM sqlite_master WHERE type='table'")
-            tables = [row[0] for row in cur.fetchall()]
+        version = get_pool(db_path).data_version()
+    except Exception:
+        # Açılamayan db: hatayı aracın kendisi döndürsün
+        return func(db_path, *args)
+    hit, value = result_cache.get(db_path, func.__name__, args, version)
+    if hit:
+        return value
+    value = func(db_path, *args)
+    if "error" not in value:
+        result_cache.put(db_path, func.__name__, args, value, version, table=args[0] if args else None)
+    return value
+
+
+def _list_tables(db_path: str) -> Dict[str, Any]:
+    try:
+        with get_pool(db_path).reader() as conn:
+            tables = list(schema_cache.tables(conn, db_path))
             return {"tables": tables, "count": len(tables)}
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-async def read_table(db_path: str, table_name: str, limit: int = 10) -> Dict[str, Any]:
-    """Read the given table and bring the content"""
+async def list_tables(db_path: str) -> Dict[str, Any]:
+    """List all the tables in db """
+    return await run_db(_cached, _list_tables, db_path)
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+def _clamp_page_size(page_size: int) -> int:
+    if page_size is None:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(page_size), MAX_PAGE_SIZE))
+
+def _fetch_page(conn, table: str, where: str = "", params=(), columns: List[str] = None,
+                after_id: int = None, page_size: int = DEFAULT_PAGE_SIZE):
+    """Keyset page ordered by rowid: returns (column_names, rows, next_cursor)"""
+    if columns:
+        projection = ", ".join(quote_identifier(col) for col in columns)
+    else:
+        projection = "*"
+
+    clauses = [where] if where else []
+    args = list(params)
+    if after_id is not None:
+        clauses.append("rowid > ?")
+        args.append(after_id)
+
+    sql = f"SELECT {projection}, rowid AS _cursor FROM {table}"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    # Bir fazlasını iste: sonraki sayfa var mı anlamak için
+    sql += " ORDER BY rowid LIMIT ?"
+    args.append(page_size + 1)
+
+    cur = conn.execute(sql, args)
+    fetched = cur.fetchmany(page_size + 1)
+    has_more = len(fetched) > page_size
+    fetched = fetched[:page_size]
+
+    rows = []
+    for r in fetched:
+        row = dict(r)
+        row.pop("_cursor")
+        rows.append(row)
+    column_names = [desc[0] for desc in cur.description if desc[0] != "_cursor"] if cur.description else []
+    next_cursor = fetched[-1]["_cursor"] if has_more else None
+    return column_names, rows, next_cursor
+
+def _read_table(db_path: str, table_name: str, limit: int = 10, after_id: int = None, page_size: int = None) -> Dict[str, Any]:
     try:
-        with connect_db(db_path) as conn:
-            cur = conn.execute(f"SELECT * FROM {table_name} LIMIT ?", (limit,))
-            rows = [dict(r) for r in cur.fetchall()]
-            
-            # Sütun isimlerini de al
-            column_names = [desc[0] for desc in cur.description] if cur.description else []
+        with get_pool(db_path).reader() as conn:
+            table = _table(conn, db_path, table_name)
+            size = _clamp_page_size(page_size if page_size is not None else limit)
+            column_names, rows, next_cursor = _fetch_page(conn, table, after_id=after_id, page_size=size)
             
             return {
                 "table": table_name,
                 "columns": column_names,
                 "rows": rows,
-                "count": len(rows)
+                "count": len(rows),
+                "next_cursor": next_cursor
             }
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-async def get_out_of_stock(db_path: str, table_name: str) -> Dict[str, Any]:
-    """Get ALL items where in_stock=0 (out of stock items)"""
+async def read_table(db_path: str, table_name: str, limit: int = 10, after_id: int = None, page_size: int = None) -> Dict[str, Any]:
+    """Read the given table and bring the content. Pass next_cursor back as after_id to get the next page"""
+    return await run_db(_cached, _read_table, db_path, table_name, limit, after_id, page_size)
+
+def _fetch_by_stock(conn, table: str, in_stock: int, columns: List[str] = None,
+                    after_id: int = None, page_size: int = None):
+    """One page of items with the given in_stock value: returns (column_names, rows, next_cursor, total)"""
+    column_names, rows, next_cursor = _fetch_page(
+        conn, table, "in_stock = ?", (in_stock,), columns, after_id, _clamp_page_size(page_size)
+    )
+    if next_cursor is None and after_id is None:
+        total = len(rows)
+    else:
+        # Birden fazla sayfa var; toplamı in_stock index'inden say
+        total = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE in_stock = ?", (in_stock,)).fetchone()[0]
+    return column_names, rows, next_cursor, total
+
+def _query_by_stock(db_path: str, table_name: str, in_stock: int, columns: List[str] = None, count_only: bool = False,
+                    after_id: int = None, page_size: int = None) -> Dict[str, Any]:
     try:
-        with connect_db(db_path) as conn:
-            # Önce kaç tane var kontrol et
-            count_cur = conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE in_stock = 0")
-            total_count = count_cur.fetchone()[0]
-            
-            # Sonra hepsini getir
-            cur = conn.execute(f"SELECT * FROM {table_name} WHERE in_stock = 0")
-            rows = [dict(r) for r in cur.fetchall()]
-            
-            column_names = [desc[0] for desc in cur.description] if cur.description else []
+        with get_pool(db_path).reader() as conn:
+            table = _table(conn, db_path, table_name)
+            if columns:
+                schema_cache.validate_columns(conn, db_path, table_name, columns)
+            if count_only:
+                # Sadece sayı lazımsa satırları hiç taşıma
+                count_cur = conn.execute(f"SELECT COUNT(*) FROM {table} WHERE in_stock = ?", (in_stock,))
+                return {"table": table_name, "in_stock": in_stock, "count": count_cur.fetchone()[0]}
+
+            column_names, rows, next_cursor, total = _fetch_by_stock(conn, table, in_stock, columns, after_id, page_size)
+            return {
+                "table": table_name,
+                "in_stock": in_stock,
+                "columns": column_names,
+                "items": rows,
+                "count": len(rows),
+                "total_in_db": total,
+                "next_cursor": next_cursor
+            }
+    except Exception as e:
+        return {"error": str(e)}
+
+@mcp.tool()
+async def query_by_stock(db_path: str, table_name: str, in_stock: int, columns: List[str] = None, count_only: bool = False,
+                         after_id: int = None, page_size: int = None) -> Dict[str, Any]:
+    """Get items by stock status (in_stock=1 or 0) in one pass; pick columns or ask only for the count. Paged like read_table"""
+    return await run_db(_cached, _query_by_stock, db_path, table_name, in_stock, columns, count_only, after_id, page_size)
+
+def _get_out_of_stock(db_path: str, table_name: str, after_id: int = None, page_size: int = None) -> Dict[str, Any]:
+    try:
+        with get_pool(db_path).reader() as conn:
+            table = _table(conn, db_path, table_name)
+            column_names, rows, next_cursor, total = _fetch_by_stock(conn, table, 0, None, after_id, page_size)
             
             return {
                 "table": table_name,
                 "columns": column_names,
                 "out_of_stock_items": rows,
-                "total_in_db": total_count,
+                "total_in_db": total,
                 "returned_count": len(rows),
-                "message": f"Found {total_count} out of stock items"
+                "next_cursor": next_cursor,
+                "message": f"Found {total} out of stock items"
             }
     except Exception as e:
         return {"error": str(e)}
 
 @mcp.tool()
-async def get_in_stock(db_path: str, table_name: str) -> Dict[str, Any]:
-    """Get ALL items where in_stock=1 (items that are in stock)"""
+async def get_out_of_stock(db_path: str, table_name: str, after_id: int = None, page_size: int = None) -> Dict[str, Any]:
+    """Get items where in_stock=0 (out of stock items). If next_cursor is set, pass it as after_id for the rest"""
+    return await run_db(_cached, _get_out_of_stock, db_path, table_name, after_id, page_size)
+
+def _get_in_stock(db_path: str, table_name: str, after_id: int = None, page_size: int = None) -> Dict[str, Any]:
     try:
-        with connect_db(db_path) as conn:
-            # Önce kaç tane var kontrol et
-            count_cur = conn.execute(f"SELECT COUNT(*) FROM {table_name} WHERE in_stock = 1")
-            total_count = count_cur.fetchone()[0]
-            
-            # Sonra hepsini getir
-            cur = conn.execute(f"SELECT * FROM {table_name} WHERE in_stock = 1")
-            rows = [dict(r) for r in cur.fetchall()]
-            
-            column_names = [desc[0] for desc in cur.description] if cur.description else []
+        with get_pool(db_path).reader() as conn:
+            table = _table(conn, db_path, table_name)
+            column_names, rows, next_cursor, total = _fetch_by_stock(conn, table, 1, None, after_id, page_size)
             
             return {
                 "table": table_name,
                 "columns": column_names,
                 "in_stock_items": rows,
-                "total_in_db": total_count,
+                "total_in_db": total,
                 "returned_count": len(rows),
-                "message": f"Found {total_count} in stock items"
+                "next_cursor": next_cursor,
+                "message": f"Found {total} in stock items"
             }
     except Exception as e:
         return {"error": str(e)}
-        
+
 @mcp.tool()
-async def add_item( db_path: str, table_name: str,item_name: str,quantity: int = 0,in_stock: int = 0) -> Dict[str, Any]:
-    """Add a new item to the table"""
+async def get_in_stock(db_path: str, table_name: str, after_id: int = None, page_size: int = None) -> Dict[str, Any]:
+    """Get items where in_stock=1 (items that are in stock). If next_cursor is set, pass it as after_id for the rest"""
+    return await run_db(_cached, _get_in_stock, db_path, table_name, after_id, page_size)
+
+DEFAULT_SUMMARY_TOP = 10
+MAX_SUMMARY_TOP = 100
+
+
+def _summary_filter(item_name: str = None, in_stock: int = None):
+    """WHERE clause and params shared by every summarize_inventory query"""
+    clauses, params = [], []
+    if item_name:
+        # Alt dize eşleşmesi: "spoon" -> "Tea spoon", "Spoons"
+        clauses.append("item_name LIKE ? ESCAPE '\\'")
+        escaped = item_name.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params.append(f"%{escaped}%")
+    if in_stock is not None:
+        clauses.append("in_stock = ?")
+        params.append(in_stock)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+def _summarize_inventory(db_path: str, table_name: str, item_name: str = None, in_stock: int = None,
+                         low_stock_threshold: int = None, group_by: str = None, top: int = DEFAULT_SUMMARY_TOP) -> Dict[str, Any]:
     try:
-        with connect_db_write(db_path) as conn:
-            # Timestamp otomatik olarak CURRENT_TIMESTAMP ile eklenir
-            cur = conn.execute(
-                f"""INSERT INTO {table_name} 
-                    (item_name, quantity, in_stock, updated_at) 
-                    VALUES (?, ?, ?, CURRENT_TIMESTAMP)""",
-                (item_name, quantity, in_stock)
-            )
-            conn.commit()
+        with get_pool(db_path).reader() as conn:
+            table = _table(conn, db_path, table_name)
+            needed = ["item_name", "quantity", "in_stock"] + ([group_by] if group_by else [])
+            schema_cache.validate_columns(conn, db_path, table_name, needed)
+            top = max(1, min(int(top), MAX_SUMMARY_TOP))
+            where, params = _summary_filter(item_name, in_stock)
+
+            # Sayım ve toplamlar tek taramada; satırlar hiç taşınmaz
+            row = conn.execute(
+                f"SELECT COUNT(*), TOTAL(quantity), MIN(quantity), MAX(quantity), "
+                f"COALESCE(SUM(in_stock = 1), 0), COALESCE(SUM(in_stock = 0), 0) FROM {table}{where}",
+                params
+            ).fetchone()
+            result = {
+                "table": table_name,
+                "filters": {k: v for k, v in (("item_name", item_name), ("in_stock", in_stock)) if v is not None},
+                "item_count": row[0],
+                "total_quantity": int(row[1]),
+                "min_quantity": row[2],
+                "max_quantity": row[3],
+                "in_stock_count": row[4],
+                "out_of_stock_count": row[5],
+            }
+
+            if low_stock_threshold is not None:
+                low_where = (where + " AND" if where else " WHERE") + " quantity <= ?"
+                low_params = params + [low_stock_threshold]
+                result["low_stock_threshold"] = low_stock_threshold
+                result["low_stock_count"] = conn.execute(
+                    f"SELECT COUNT(*) FROM {table}{low_where}", low_params
+                ).fetchone()[0]
+                # Sadece en azı kalan birkaç ürün: tablonun tamamı değil
+                result["low_stock_items"] = [dict(r) for r in conn.execute(
+                    f"SELECT item_name, quantity, in_stock FROM {table}{low_where} ORDER BY quantity, item_name LIMIT ?",
+                    low_params + [top]
+                ).fetchall()]
+
+            if group_by:
+                column = quote_identifier(group_by)
+                groups = conn.execute(
+                    f"SELECT {column} AS value, COUNT(*) AS item_count, TOTAL(quantity) AS total_quantity "
+                    f"FROM {table}{where} GROUP BY {column} ORDER BY item_count DESC, value LIMIT ?",
+                    params + [top + 1]
+                ).fetchall()
+                result["group_by"] = group_by
+                result["groups"] = [{"value": g["value"], "item_count": g["item_count"],
+                                     "total_quantity": int(g["total_quantity"])} for g in groups[:top]]
+                result["more_groups"] = len(groups) > top
+            return result
+    except Exception as e:
+        return {"error": str(e)}
+
+@mcp.tool()
+async def summarize_inventory(db_path: str, table_name: str, item_name: str = None, in_stock: int = None,
+                              low_stock_threshold: int = None, group_by: str = None,
+                              top: int = DEFAULT_SUMMARY_TOP) -> Dict[str, Any]:
+    """Counts and totals computed in SQL (item count, total/min/max quantity, in/out of stock counts) without returning rows.
+    Filter by item_name substring and in_stock; low_stock_threshold adds the count and the `top` lowest items with
+    quantity <= threshold; group_by adds per-value counts and quantity sums"""
+    return await run_db(_cached, _summarize_inventory, db_path, table_name, item_name, in_stock,
+                        low_stock_threshold, group_by, top)
+
+def _read_chunk(db_path: str, table_name: str, in_stock: int = None, columns: List[str] = None,
+                after_id: int = None, page_size: int = None):
+    with get_pool(db_path).reader() as conn:
+        table = _table(conn, db_path, table_name)
+        if columns:
+            schema_cache.validate_columns(conn, db_path, table_name, columns)
+        if in_stock is None:
+            return _fetch_page(conn, table, "", (), columns, after_id, _clamp_page_size(page_size))
+        return _fetch_page(conn, table, "in_stock = ?", (in_stock,), columns, after_id, _clamp_page_size(page_size))
+
+@mcp.tool()
+async def stream_table(db_path: str, table_name: str, in_stock: int = None, columns: List[str] = None,
+                       page_size: int = DEFAULT_PAGE_SIZE, ctx: Context = None) -> Dict[str, Any]:
+    """Stream a whole table (optionally only in_stock=0/1 and some columns) page by page as progress notifications.
+    Each notification's message is a JSON chunk {"chunk", "columns", "rows", "next_cursor"}; the result only has
+    the chunk and row counts. Call it with a progress callback (see voice_grammar.fetch_item_names)"""
+    meta = ctx.request_context.meta if ctx is not None else None
+    if meta is None or meta.progressToken is None:
+        # Progress token yoksa bildirimler hiç gönderilmez: satırlar sessizce kaybolmasın
+        return {"error": "stream_table needs a progress token; call it with a progress callback or use read_table paging"}
+    try:
+        cursor, chunks, sent = None, 0, 0
+        while True:
+            # Her seferinde tek sayfa bellekte: tablo ne kadar büyük olursa olsun sınırlı
+            column_names, rows, cursor = await run_db(_read_chunk, db_path, table_name, in_stock, columns, cursor, page_size)
+            if rows:
+                chunks += 1
+                sent += len(rows)
+                chunk = {"table": table_name, "chunk": chunks, "columns": column_names, "rows": rows, "next_cursor": cursor}
+                await ctx.report_progress(sent, None, json.dumps(chunk, default=str))
+            if cursor is None:
+                break
+        return {"table": table_name, "streamed": True, "chunks": chunks, "count": sent}
+    except Exception as e:
+        return {"error": str(e)}
+
+def _row_dict(row) -> Dict[str, Any]:
+    item = dict(row)
+    item.pop("_rowid", None)
+    return item
+
+@retry_on_busy
+def _add_item( db_path: str, table_name: str,item_name: str,quantity: int = 0,in_stock: int = 0) -> Dict[str, Any]:
+    with get_pool(db_path).writer() as conn:
+        table = _table(conn, db_path, table_name)
+        # Timestamp otomatik olarak CURRENT_TIMESTAMP ile eklenir
+        insert_query = f"""INSERT INTO {table} 
+                (item_name, quantity, in_stock, updated_at) 
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)"""
+        params = (item_name, quantity, in_stock)
+        
+        if HAS_RETURNING:
+            # Tek statement: eklenen satır RETURNING ile geri gelir
+            cur = conn.execute(insert_query + " RETURNING rowid AS _rowid, *", params)
+            row = cur.fetchone()
+            inserted_id = row["_rowid"]
+            inserted_row = _row_dict(row)
+        else:
+            cur = conn.execute(insert_query, params)
             
             # Eklenen item'ın ID'sini al
             inserted_id = cur.lastrowid
             
             # Eklenen item'ı kontrol et
             check_cur = conn.execute(
-                f"SELECT * FROM {table_name} WHERE id = ?",
+                f"SELECT * FROM {table} WHERE rowid = ?",
                 (inserted_id,)
             )
             inserted_row = dict(check_cur.fetchone())
-            
-            return {
-                "success": True,
-                "message": f"Item '{item_name}' added successfully",
-                "inserted_id": inserted_id,
-                "inserted_item": inserted_row
-            }
+        
+        return {
+            "success": True,
+            "message": f"Item '{item_name}' added successfully",
+            "inserted_id": inserted_id,
+            "inserted_item": inserted_row
+        }
+
+@mcp.tool()
+async def add_item( db_path: str, table_name: str,item_name: str,quantity: int = 0,in_stock: int = 0) -> Dict[str, Any]:
+    """Add a new item to the table"""
+    try:
+        result = await run_db(_add_item, db_path, table_name, item_name, quantity, in_stock)
+        result_cache.invalidate_table(db_path, table_name)
+        return result
     except Exception as e:
         return {
             "success": False,
             "error": str(e)
         }
 
-@mcp.tool()
-async def delete_item(db_path: str, table_name: str,item_name: str) -> Dict[str, Any]:
-    """Delete an item from the table by its name"""
-    try:
-        with connect_db_write(db_path) as conn:
+@retry_on_busy
+def _delete_item(db_path: str, table_name: str,item_name: str) -> Dict[str, Any]:
+    with get_pool(db_path).writer() as conn:
+        table = _table(conn, db_path, table_name)
+        if HAS_RETURNING:
+            # Tek statement: silinen satırlar RETURNING ile geri gelir
+            cur = conn.execute(
+                f"DELETE FROM {table} WHERE item_name = ? RETURNING *",
+                (item_name,)
+            )
+            item = cur.fetchone()
+            cur.fetchall()
+        else:
             # Önce item'ın var olup olmadığını kontrol et
             check_cur = conn.execute(
-                f"SELECT * FROM {table_name} WHERE item_name = ?",
+                f"SELECT * FROM {table} WHERE item_name = ?",
                 (item_name,)
             )
             item = check_cur.fetchone()
             
-            if not item:
-                return {
-                    "success": False,
-                    "message": f"Item '{item_name}' not found in table {table_name}"
-                }
-            
-            # Item bilgilerini sakla
-            deleted_item = dict(item)
-            
-            # Item'ı sil
-            conn.execute(
-                f"DELETE FROM {table_name} WHERE item_name = ?",
-                (item_name,)
-            )
-            conn.commit()
-            
+            if item:
+                conn.execute(
+                    f"DELETE FROM {table} WHERE item_name = ?",
+                    (item_name,)
+                )
+        
+        if not item:
             return {
-                "success": True,
-                "message": f"Item '{item_name}' deleted successfully",
-                "deleted_item": deleted_item
+                "success": False,
+                "message": f"Item '{item_name}' not found in table {table_name}"
             }
+        
+        return {
+            "success": True,
+            "message": f"Item '{item_name}' deleted successfully",
+            "deleted_item": dict(item)
+        }
+
+@mcp.tool()
+async def delete_item(db_path: str, table_name: str,item_name: str) -> Dict[str, Any]:
+    """Delete an item from the table by its name"""
+    try:
+        result = await run_db(_delete_item, db_path, table_name, item_name)
+        result_cache.invalidate_table(db_path, table_name)
+        return result
     except Exception as e:
         return {
             "success": False,
@@ -177,88 +435,426 @@ async def delete_item(db_path: str, table_name: str,item_name: str) -> Dict[str,
         }
 
 
-@mcp.tool()
-async def update_item(db_path: str, table_name: str,item_name: str,new_item_name: str = None,quantity: int = None,in_stock: int = None) -> Dict[str, Any]:
-    """Update an existing item in the table by its name"""
-    try:
-        with connect_db_write(db_path) as conn:
-            # Önce item'ın var olup olmadığını kontrol et
-            check_cur = conn.execute(
-                f"SELECT * FROM {table_name} WHERE item_name = ?",
-                (item_name,)
-            )
-            old_item = check_cur.fetchone()
-            
-            if not old_item:
-                return {
-                    "success": False,
-                    "message": f"Item '{item_name}' not found in table {table_name}"
-                }
-            
-            # Eski item bilgilerini sakla
-            old_item_dict = dict(old_item)
-            
-            # Güncellenecek alanları belirle
-            updates = []
-            params = []
-            
-            if new_item_name is not None:
-                updates.append("item_name = ?")
-                params.append(new_item_name)
-            
-            if quantity is not None:
-                updates.append("quantity = ?")
-                params.append(quantity)
-            
-            if in_stock is not None:
-                updates.append("in_stock = ?")
-                params.append(in_stock)
-            
-            # updated_at her zaman güncellenir
-            updates.append("updated_at = CURRENT_TIMESTAMP")
-            
-            if len(updates) == 1:  # Sadece updated_at varsa
-                return {
-                    "success": False,
-                    "message": "No fields to update"
-                }
-            
-            # UPDATE query'sini oluştur
-            update_query = f"UPDATE {table_name} SET {', '.join(updates)} WHERE item_name = ?"
-            params.append(item_name)
-            
-            # Güncelleme yap
+@retry_on_busy
+def _update_item(db_path: str, table_name: str,item_name: str,new_item_name: str = None,quantity: int = None,in_stock: int = None) -> Dict[str, Any]:
+    # Güncellenecek alanları belirle
+    updates = []
+    params = []
+    
+    if new_item_name is not None:
+        updates.append("item_name = ?")
+        params.append(new_item_name)
+    
+    if quantity is not None:
+        updates.append("quantity = ?")
+        params.append(quantity)
+    
+    if in_stock is not None:
+        updates.append("in_stock = ?")
+        params.append(in_stock)
+    
+    if not updates:
+        return {
+            "success": False,
+            "message": "No fields to update"
+        }
+    
+    # updated_at her zaman güncellenir
+    updates.append("updated_at = CURRENT_TIMESTAMP")
+    
+    params.append(item_name)
+    
+    with get_pool(db_path).writer() as conn:
+        table = _table(conn, db_path, table_name)
+        # UPDATE query'sini oluştur
+        update_query = f"UPDATE {table} SET {', '.join(updates)} WHERE item_name = ?"
+        
+        # Eski değerler için SELECT şart: SQLite RETURNING yalnızca yeni değerleri verir
+        check_cur = conn.execute(
+            f"SELECT rowid AS _rowid, * FROM {table} WHERE item_name = ?",
+            (item_name,)
+        )
+        old_item = check_cur.fetchone()
+        
+        if not old_item:
+            return {
+                "success": False,
+                "message": f"Item '{item_name}' not found in table {table_name}"
+            }
+        
+        if HAS_RETURNING:
+            cur = conn.execute(update_query + " RETURNING rowid AS _rowid, *", params)
+            updated = {r["_rowid"]: r for r in cur.fetchall()}
+            updated_item = _row_dict(updated[old_item["_rowid"]])
+        else:
             conn.execute(update_query, params)
-            conn.commit()
             
-            # Güncellenmiş item'ı getir (isim değiştiyse yeni isimle ara)
-            search_name = new_item_name if new_item_name else item_name
+            # Güncellenmiş item'ı rowid ile getir (isim değişmiş olabilir)
             updated_cur = conn.execute(
-                f"SELECT * FROM {table_name} WHERE item_name = ?",
-                (search_name,)
+                f"SELECT * FROM {table} WHERE rowid = ?",
+                (old_item["_rowid"],)
             )
             updated_item = dict(updated_cur.fetchone())
-            
-            return {
+        
+        return {
+            "success": True,
+            "message": f"Item '{item_name}' updated successfully",
+            "old_item": _row_dict(old_item),
+            "updated_item": updated_item
+        }
+
+@mcp.tool()
+async def update_item(db_path: str, table_name: str,item_name: str,new_item_name: str = None,quantity: int = None,in_stock: int = None) -> Dict[str, Any]:
+    """Update an existing item in the table by its name"""
+    try:
+        result = await run_db(_update_item, db_path, table_name, item_name, new_item_name, quantity, in_stock)
+        result_cache.invalidate_table(db_path, table_name)
+        return result
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+MAX_BATCH_SIZE = 1000
+SQL_PARAM_CHUNK = 500  # SQLite parametre sınırının altında kal
+
+
+def _check_batch(items) -> None:
+    if not items:
+        raise ValueError("No items given")
+    if len(items) > MAX_BATCH_SIZE:
+        raise ValueError(f"Too many items in one batch ({len(items)} > {MAX_BATCH_SIZE})")
+
+def _duplicate_result(name: str, first: int) -> Dict[str, Any]:
+    return {"success": False, "duplicate": True,
+            "message": f"Item '{name}' is listed more than once; only item #{first} was applied"}
+
+def _rows_by_name(conn, table: str, names: List[str]) -> Dict[str, Any]:
+    """First row for each item_name (same as the single-item tools), fetched with chunked IN queries"""
+    found = {}
+    unique = list(dict.fromkeys(names))
+    for start in range(0, len(unique), SQL_PARAM_CHUNK):
+        chunk = unique[start:start + SQL_PARAM_CHUNK]
+        placeholders = ", ".join("?" for _ in chunk)
+        cur = conn.execute(
+            f"SELECT rowid AS _rowid, * FROM {table} WHERE item_name IN ({placeholders}) ORDER BY rowid",
+            chunk
+        )
+        for r in cur.fetchall():
+            found.setdefault(r["item_name"], r)
+    return found
+
+@retry_on_busy
+def _add_items(db_path: str, table_name: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    _check_batch(items)
+    with get_pool(db_path).writer() as conn:
+        table = _table(conn, db_path, table_name)
+        # IMMEDIATE: başka bir yazar araya girip rowid'leri kaydıramaz
+        conn.execute("BEGIN IMMEDIATE")
+
+        results = [None] * len(items)
+        valid, params = [], []
+        for i, item in enumerate(items):
+            name = item.get("item_name")
+            if not name:
+                results[i] = {"success": False, "message": "item_name is required"}
+                continue
+            valid.append(i)
+            params.append((name, item.get("quantity", 0), item.get("in_stock", 0)))
+
+        last_id = conn.execute(f"SELECT COALESCE(MAX(rowid), 0) FROM {table}").fetchone()[0]
+        conn.executemany(
+            f"""INSERT INTO {table} 
+                (item_name, quantity, in_stock, updated_at) 
+                VALUES (?, ?, ?, CURRENT_TIMESTAMP)""",
+            params
+        )
+
+        # Yeni satırlar eklenme sırasıyla last_id'den sonra gelir
+        cur = conn.execute(f"SELECT rowid AS _rowid, * FROM {table} WHERE rowid > ? ORDER BY rowid", (last_id,))
+        for i, row in zip(valid, cur.fetchall()):
+            results[i] = {
                 "success": True,
-                "message": f"Item '{item_name}' updated successfully",
-                "old_item": old_item_dict,
-                "updated_item": updated_item
+                "message": f"Item '{row['item_name']}' added successfully",
+                "inserted_id": row["_rowid"],
+                "inserted_item": _row_dict(row)
             }
+
+        return {
+            "success": True,
+            "message": f"Added {len(valid)} of {len(items)} items",
+            "added_count": len(valid),
+            "results": results
+        }
+
+@mcp.tool()
+async def add_items(db_path: str, table_name: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Add many items in one transaction. items: [{"item_name": str, "quantity": int, "in_stock": 0|1}, ...]"""
+    try:
+        result = await run_db(_add_items, db_path, table_name, items)
+        result_cache.invalidate_table(db_path, table_name)
+        return result
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+@retry_on_busy
+def _delete_items(db_path: str, table_name: str, item_names: List[str]) -> Dict[str, Any]:
+    _check_batch(item_names)
+    with get_pool(db_path).writer() as conn:
+        table = _table(conn, db_path, table_name)
+        conn.execute("BEGIN IMMEDIATE")
+        found = _rows_by_name(conn, table, item_names)
+
+        results, first_seen = [], {}
+        for i, name in enumerate(item_names):
+            if name in first_seen:
+                # Aynı isim ikinci kez: ilk DELETE zaten bütün satırları sildi
+                results.append(_duplicate_result(name, first_seen[name]))
+                continue
+            first_seen[name] = i
+            if name in found:
+                results.append({
+                    "success": True,
+                    "message": f"Item '{name}' deleted successfully",
+                    "deleted_item": _row_dict(found[name])
+                })
+            else:
+                results.append({
+                    "success": False,
+                    "message": f"Item '{name}' not found in table {table_name}"
+                })
+
+        # Her isim bir kez ve hepsi anlık görüntüde var: hepsi eşleşir
+        conn.executemany(
+            f"DELETE FROM {table} WHERE item_name = ?",
+            [(name,) for name in found]
+        )
+
+        return {
+            "success": True,
+            "message": f"Deleted {len(found)} of {len(item_names)} items",
+            "deleted_count": len(found),
+            "results": results
+        }
+
+@mcp.tool()
+async def delete_items(db_path: str, table_name: str, item_names: List[str]) -> Dict[str, Any]:
+    """Delete many items by name in one transaction; a name listed twice is reported as a duplicate"""
+    try:
+        result = await run_db(_delete_items, db_path, table_name, item_names)
+        result_cache.invalidate_table(db_path, table_name)
+        return result
     except Exception as e:
         return {
             "success": False,
             "error": str(e)
         }
 
+UPDATABLE_FIELDS = (("new_item_name", "item_name"), ("quantity", "quantity"), ("in_stock", "in_stock"))
+
+def _update_fields(item: Dict[str, Any]):
+    return tuple(key for key, _ in UPDATABLE_FIELDS if item.get(key) is not None)
+
+def _update_result(name: str, old, new) -> Dict[str, Any]:
+    return {
+        "success": True,
+        "message": f"Item '{name}' updated successfully",
+        "old_item": _row_dict(old),
+        "updated_item": _row_dict(new)
+    }
+
+def _update_in_order(conn, table: str, table_name: str, items: List[Dict[str, Any]], indexes: List[int], results: list):
+    """One item at a time, as consecutive update_item calls would: later items see earlier renames"""
+    for i in indexes:
+        item, name = items[i], items[i]["item_name"]
+        old = conn.execute(f"SELECT rowid AS _rowid, * FROM {table} WHERE item_name = ? ORDER BY rowid LIMIT 1",
+                           (name,)).fetchone()
+        if old is None:
+            results[i] = {"success": False, "message": f"Item '{name}' not found in table {table_name}"}
+            continue
+        fields = _update_fields(item)
+        sets = ", ".join(f"{column} = ?" for key, column in UPDATABLE_FIELDS if key in fields)
+        cur = conn.execute(f"UPDATE {table} SET {sets}, updated_at = CURRENT_TIMESTAMP WHERE item_name = ?",
+                           tuple(item[key] for key in fields) + (name,))
+        if cur.rowcount == 0:
+            results[i] = {"success": False, "message": f"Item '{name}' not found in table {table_name}"}
+            continue
+        new = conn.execute(f"SELECT rowid AS _rowid, * FROM {table} WHERE rowid = ?", (old["_rowid"],)).fetchone()
+        results[i] = _update_result(name, old, new)
+
+@retry_on_busy
+def _update_items(db_path: str, table_name: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    _check_batch(items)
+    with get_pool(db_path).writer() as conn:
+        table = _table(conn, db_path, table_name)
+        conn.execute("BEGIN IMMEDIATE")
+
+        results = [None] * len(items)
+        pending, first_seen = [], {}
+        for i, item in enumerate(items):
+            name = item.get("item_name")
+            if not name:
+                results[i] = {"success": False, "message": "item_name is required"}
+            elif name in first_seen:
+                results[i] = _duplicate_result(name, first_seen[name])
+            elif not _update_fields(item):
+                first_seen[name] = i
+                results[i] = {"success": False, "message": "No fields to update"}
+            else:
+                first_seen[name] = i
+                pending.append(i)
+
+        renamed_to = {items[i]["new_item_name"] for i in pending if items[i].get("new_item_name") is not None}
+        if renamed_to & set(first_seen):
+            # Bir item başka bir item'ın adını alıyor: anlık görüntü geçersiz, sırayla çalıştır
+            _update_in_order(conn, table, table_name, items, pending, results)
+        else:
+            # İsimler birbirini etkilemiyor: anlık görüntüdeki her satır kendi UPDATE'iyle eşleşir
+            found = _rows_by_name(conn, table, [items[i]["item_name"] for i in pending])
+            # Aynı alanları güncelleyen ardışık item'lar tek executemany'de gider (sıra korunur)
+            groups = []
+            for i in pending:
+                if items[i]["item_name"] not in found:
+                    results[i] = {"success": False, "message": f"Item '{items[i]['item_name']}' not found in table {table_name}"}
+                    continue
+                fields = _update_fields(items[i])
+                if not groups or groups[-1][0] != fields:
+                    groups.append((fields, []))
+                groups[-1][1].append(i)
+
+            for fields, indexes in groups:
+                columns = [column for key, column in UPDATABLE_FIELDS if key in fields]
+                sets = ", ".join(f"{column} = ?" for column in columns)
+                conn.executemany(
+                    f"UPDATE {table} SET {sets}, updated_at = CURRENT_TIMESTAMP WHERE item_name = ?",
+                    [tuple(items[i][key] for key in fields) + (items[i]["item_name"],) for i in indexes]
+                )
+
+            # Güncel halleri rowid ile getir (isim değişmiş olabilir)
+            updated = [i for _, indexes in groups for i in indexes]
+            rowids = [found[items[i]["item_name"]]["_rowid"] for i in updated]
+            new_rows = {}
+            for start in range(0, len(rowids), SQL_PARAM_CHUNK):
+                chunk = rowids[start:start + SQL_PARAM_CHUNK]
+                placeholders = ", ".join("?" for _ in chunk)
+                cur = conn.execute(f"SELECT rowid AS _rowid, * FROM {table} WHERE rowid IN ({placeholders})", chunk)
+                new_rows.update({r["_rowid"]: r for r in cur.fetchall()})
+
+            for i in updated:
+                old = found[items[i]["item_name"]]
+                results[i] = _update_result(items[i]["item_name"], old, new_rows[old["_rowid"]])
+
+        updated_count = sum(1 for r in results if r["success"])
+        return {
+            "success": True,
+            "message": f"Updated {updated_count} of {len(items)} items",
+            "updated_count": updated_count,
+            "results": results
+        }
+
+@mcp.tool()
+async def update_items(db_path: str, table_name: str, items: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Update many items by name in one transaction. items: [{"item_name": str, "new_item_name": str, "quantity": int, "in_stock": 0|1}, ...]
+    Items are applied in order; an item_name listed twice is reported as a duplicate"""
+    try:
+        result = await run_db(_update_items, db_path, table_name, items)
+        result_cache.invalidate_table(db_path, table_name)
+        return result
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e)
+        }
+
+
+@retry_on_busy
+def _ensure_indexes(db_path: str, table_name: str, unique_item_name: bool = False) -> Dict[str, Any]:
+    with get_pool(db_path).writer() as conn:
+        schema_cache.validate_table(conn, db_path, table_name)
+        return create_indexes(conn, table_name, unique_item_name)
+
+@mcp.tool()
+async def ensure_indexes(db_path: str, table_name: str, unique_item_name: bool = False) -> Dict[str, Any]:
+    """Create indexes on item_name and in_stock (optionally UNIQUE on item_name) if they are missing"""
+    try:
+        return await run_db(_ensure_indexes, db_path, table_name, unique_item_name)
+    except Exception as e:
+        return {"error": str(e)}
+
+
+def _db_version(db_path: str) -> Dict[str, Any]:
+    try:
+        return {"db_path": db_path, "version": get_pool(db_path).version_token()}
+    except Exception as e:
+        return {"error": str(e)}
+
+@mcp.tool()
+async def db_version(db_path: str) -> Dict[str, Any]:
+    """Return a version token for the db that changes after every write; clients use it to invalidate their caches"""
+    return await run_db(_db_version, db_path)
+
+
+@mcp.tool()
+async def cache_stats() -> Dict[str, Any]:
+    """Show result cache and schema cache counters"""
+    try:
+        return {**result_cache.stats(), "schema": schema_cache.stats()}
+    except Exception as e:
+        return {"error": str(e)}
+
+
+@mcp.tool()
+async def pool_stats() -> Dict[str, Any]:
+    """Show connection pool statistics for every database opened so far"""
+    try:
+        return collect_pool_stats()
+    except Exception as e:
+        return {"error": str(e)}
+
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description="MCP SQLite Reader Service")
     parser.add_argument("--connection_type", type=str, default="http", choices=["http", "stdio"])
     parser.add_argument("--port", type=int, default=3002)
+    parser.add_argument("--pool_size", type=int, default=DEFAULT_POOL_SIZE, help="Max read-only connections per db file")
+    parser.add_argument("--pool_idle_timeout", type=float, default=DEFAULT_IDLE_TIMEOUT, help="Close pooled connections idle for this many seconds")
+    parser.add_argument("--statement_cache_size", type=int, default=pool_config["statement_cache_size"], help="Prepared statements kept per connection")
+    parser.add_argument("--db_workers", type=int, default=DEFAULT_DB_WORKERS, help="Worker threads that run SQLite calls off the event loop")
+    parser.add_argument("--db_path", type=str, default="kitchen.db", help="Database to prepare at startup")
+    parser.add_argument("--journal_mode", type=str, default=pragma_config["journal_mode"])
+    parser.add_argument("--synchronous", type=str, default=pragma_config["synchronous"], choices=["OFF", "NORMAL", "FULL", "EXTRA"])
+    parser.add_argument("--busy_timeout", type=int, default=pragma_config["busy_timeout"], help="Milliseconds to wait on a locked db")
+    parser.add_argument("--cache_size", type=int, default=pragma_config["cache_size"], help="PRAGMA cache_size (negative = KiB)")
+    parser.add_argument("--mmap_size", type=int, default=pragma_config["mmap_size"], help="PRAGMA mmap_size in bytes")
+    parser.add_argument("--index_tables", type=str, nargs="*", default=["materials"], help="Tables to index at startup")
+    parser.add_argument("--unique_item_name", action="store_true", help="Make item_name UNIQUE when indexing")
+    parser.add_argument("--result_cache_entries", type=int, default=DEFAULT_CACHE_ENTRIES, help="Max cached read results (0 disables the cache)")
+    parser.add_argument("--result_cache_ttl", type=float, default=DEFAULT_CACHE_TTL, help="Seconds a cached read result stays valid")
+    parser.add_argument("--busy_retries", type=int, default=retry_config["attempts"], help="Attempts for writes that hit SQLITE_BUSY")
     args = parser.parse_args()
 
     mcp.port = args.port
+    configure_pools(args.pool_size, args.pool_idle_timeout, args.statement_cache_size)
+    configure_executor(args.db_workers)
+    configure_pragmas(args.journal_mode, args.synchronous, args.busy_timeout, args.cache_size, args.mmap_size)
+    configure_retry(attempts=args.busy_retries)
+    result_cache.max_entries = args.result_cache_entries
+    result_cache.ttl = args.result_cache_ttl
+    if os.path.exists(args.db_path):
+        db_settings = init_database(args.db_path)
+        get_pool(args.db_path)
+        print(f"Prepared {args.db_path}: journal_mode={db_settings['journal_mode']}, synchronous={db_settings['synchronous']}")
+        for table in args.index_tables:
+            try:
+                result = _ensure_indexes(args.db_path, table, args.unique_item_name)
+                print(f"Indexes on {table}: {', '.join(result['indexes'])}")
+            except Exception as e:
+                print(f"Could not index {table}: {e}")
     server_type = "sse" if args.connection_type == "http" else "stdio"
     print(f"Starting SQLite Reader on port {args.port} via {args.connection_type}")
     mcp.run(server_type)
\ No newline at end of file
@@ -0,0 +1,164 @@
+"""
+Offline batch transcription of recorded voice commands (no microphone needed).
+
+Every WAV file under the given paths is streamed block by block through a
+KaldiRecognizer in a ProcessPoolExecutor worker. Each worker loads the Vosk
+Model once (pool initializer) and reuses it for all of its files. Results go
+to a JSONL file, one line per file, in completion order. The summary reports
+the realtime factor (processing time / audio duration, lower is faster) per
+file and for the whole batch, so throughput can be compared across worker
+counts:
+
+    python transcribe_batch.py recordings/ --out transcripts.jsonl
+    python transcribe_batch.py recordings/ --workers 1 2 4 8 --out /dev/null
+
+Files must be 16-bit mono PCM; the recognizer runs at each file's own sample rate.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List
+
+from call_stats import percentile
+from voice_query import DEFAULT_VOSK_MODEL
+
+DEFAULT_BLOCK_FRAMES = 4000  # tanıyıcıya her seferinde verilen örnek sayısı
+
+_model = None  # işçi sürecine özel; initializer bir kez yükler
+
+
+def _init_worker(model_path: str, loaded=None):
+    global _model
+    try:
+        from vosk import Model, SetLogLevel
+        SetLogLevel(-1)
+        _model = Model(model_path)
+    except BaseException:
+        # Diğer işçiler bariyerde sonsuza kadar beklemesin
+        if loaded is not None:
+            loaded.abort()
+        raise
+    if loaded is not None:
+        # Bütün işçiler modeli yükleyene kadar hiçbiri görev almaz
+        loaded.wait()
+
+
+def _worker_ready(_) -> int:
+    return os.getpid()
+
+
+def transcribe_file(path: str, block_frames: int = DEFAULT_BLOCK_FRAMES) -> Dict[str, Any]:
+    """Transcribe one WAV file with the worker's model: text, utterance segments, duration and timings"""
+    from vosk import KaldiRecognizer
+
+    start, cpu_start = time.perf_counter(), time.process_time()
+    try:
+        with wave.open(path, "rb") as wf:
+            if wf.getnchannels() != 1 or wf.getsampwidth() != 2 or wf.getcomptype() != "NONE":
+                raise ValueError("expected 16-bit mono PCM")
+            rate = wf.getframerate()
+            duration = wf.getnframes() / rate
+            recognizer = KaldiRecognizer(_model, rate)
+            recognizer.SetWords(True)
+            segments = []
+            while True:
+                data = wf.readframes(block_frames)
+                if not data:
+                    break
+                if recognizer.AcceptWaveform(data):
+                    segments.append(json.loads(recognizer.Result()))
+            segments.append(json.loads(recognizer.FinalResult()))
+    except Exception as e:
+        return {"file": path, "error": str(e)}
+
+    elapsed = time.perf_counter() - start
+    segments = [s for s in segments if s.get("text")]
+    return {
+        "file": path,
+        "text": " ".join(s["text"] for s in segments),
+        "segments": [{"text": s["text"],
+                      "start": s["result"][0]["start"] if s.get("result") else None,
+                      "end": s["result"][-1]["end"] if s.get("result") else None} for s in segments],
+        "duration_s": round(duration, 3),
+        "elapsed_s": round(elapsed, 3),
+        "cpu_s": round(time.process_time() - cpu_start, 3),
+        "rtf": round(elapsed / duration, 4) if duration else None,
+    }
+
+
+def find_wavs(paths: List[str]) -> List[str]:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in os.walk(path):
+                files.extend(os.path.join(root, n) for n in names if n.lower().endswith(".wav"))
+        else:
+            files.append(path)
+    # Büyük dosyalar önce: sona kalan uzun bir dosya işçileri boşta bekletmesin
+    return sorted(files, key=lambda f: os.path.getsize(f) if os.path.exists(f) else 0, reverse=True)
+
+
+def run_batch(files: List[str], model_path: str, workers: int, out, block_frames: int = DEFAULT_BLOCK_FRAMES) -> Dict[str, Any]:
+    """Transcribe files on `workers` processes, writing one JSON line per file to `out` as results arrive"""
+    results = []
+    loaded = multiprocessing.Barrier(workers)
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(model_path, loaded)) as pool:
+        # Model yükleme süresi ölçüme girmesin. `workers` görev bütün işçileri başlatır (işçiler
+        # gerektikçe açılsa bile); bariyer yüzünden ilk görev ancak hepsi modeli yükleyince biter
+        list(pool.map(_worker_ready, range(workers)))
+        start = time.perf_counter()
+        futures = [pool.submit(transcribe_file, f, block_frames) for f in files]
+        for future in as_completed(futures):
+            result = future.result()
+            result["workers"] = workers
+            results.append(result)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+    wall = time.perf_counter() - start
+
+    ok = [r for r in results if "error" not in r]
+    audio = sum(r["duration_s"] for r in ok)
+    return {
+        "workers": workers,
+        "files": len(results),
+        "errors": len(results) - len(ok),
+        "audio_s": audio,
+        "wall_s": wall,
+        "cpu_s": sum(r["cpu_s"] for r in ok),
+        "batch_rtf": wall / audio if audio else None,
+        "file_rtf_p50": percentile([r["rtf"] for r in ok if r["rtf"] is not None], 50),
+        "file_rtf_p95": percentile([r["rtf"] for r in ok if r["rtf"] is not None], 95),
+    }
+
+
+def main(args):
+    files = find_wavs(args.paths)
+    if not files:
+        print("No WAV files found")
+        return
+    print(f"🎧 {len(files)} files, model {args.model_path}")
+    print(f"\n{'workers':>7} {'files':>6} {'errors':>6} {'audio':>9} {'wall':>9} {'batch_rtf':>9} "
+          f"{'file_p50':>9} {'file_p95':>9} {'x realtime':>10}")
+    with open(args.out, "w", encoding="utf-8") as out:
+        for workers in args.workers:
+            r = run_batch(files, args.model_path, workers, out, args.block_frames)
+            speed = f"{1 / r['batch_rtf']:.1f}x" if r["batch_rtf"] else "-"
+            rtf = f"{r['batch_rtf']:.4f}" if r["batch_rtf"] is not None else "-"
+            print(f"{r['workers']:>7} {r['files']:>6} {r['errors']:>6} {r['audio_s']:>8.1f}s {r['wall_s']:>8.2f}s "
+                  f"{rtf:>9} {r['file_rtf_p50']:>9.4f} {r['file_rtf_p95']:>9.4f} {speed:>10}")
+    print(f"\n📝 Results written to {args.out}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Transcribe WAV files with Vosk on a process pool and write JSONL")
+    parser.add_argument("paths", nargs="+", help="WAV files or directories to search recursively")
+    parser.add_argument("--model_path", type=str, default=DEFAULT_VOSK_MODEL)
+    parser.add_argument("--out", type=str, default="transcripts.jsonl")
+    parser.add_argument("--workers", type=int, nargs="+", default=[os.cpu_count() or 1],
+                        help="Process count; give several to compare throughput (every level transcribes all files again)")
+    parser.add_argument("--block_frames", type=int, default=DEFAULT_BLOCK_FRAMES, help="Samples fed per AcceptWaveform call")
+    main(parser.parse_args())
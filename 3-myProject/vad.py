@@ -0,0 +1,125 @@
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+DEFAULT_FRAME_MS = 30
+DEFAULT_THRESHOLD_DB = -45.0   # dBFS: bunun altı her zaman sessizlik
+DEFAULT_MARGIN_DB = 10.0       # gürültü tabanının bu kadar üstü konuşma sayılır
+DEFAULT_START_MS = 90          # bu kadar art arda konuşma çerçevesi gelmeden tetiklenmez (tık, kapı sesi)
+DEFAULT_HANGOVER_MS = 600      # konuşma bittikten sonra bu kadar sessizlik daha gönderilir
+DEFAULT_PREROLL_MS = 300       # tetiklenmeden önceki ses: ilk hece kesilmesin
+NOISE_ALPHA = 0.05             # gürültü tabanı sessiz çerçevelerle yavaşça güncellenir
+
+_EPS = 1e-10
+
+
+class EnergyVAD:
+    """Energy-based voice activity detection over int16 mono blocks
+
+    Blocks are cut into frames and each frame's RMS level (dBFS) is compared with
+    max(threshold_db, noise floor + margin_db); the noise floor follows the quiet
+    frames. process() returns only the audio worth recognizing: the pre-roll
+    before speech started, the speech and a hangover of trailing silence. While
+    nothing is said it returns None, so the recognizer never runs.
+    """
+
+    def __init__(self, samplerate: int = 16000, frame_ms: int = DEFAULT_FRAME_MS,
+                 threshold_db: float = DEFAULT_THRESHOLD_DB, margin_db: float = DEFAULT_MARGIN_DB,
+                 start_ms: int = DEFAULT_START_MS, hangover_ms: int = DEFAULT_HANGOVER_MS,
+                 preroll_ms: int = DEFAULT_PREROLL_MS):
+        self.samplerate = samplerate
+        self.frame_len = samplerate * frame_ms // 1000
+        self.threshold_db = threshold_db
+        self.margin_db = margin_db
+        self.start_frames = max(1, start_ms // frame_ms)
+        self.hangover_frames = max(1, hangover_ms // frame_ms)
+        self.noise_db = threshold_db - margin_db
+        self.in_speech = False
+        self.lag_samples = 0  # son konuşma çerçevesinin bitişinden bu yana gelen örnek sayısı
+        # Ön-kayıt önceden ayrılmış bir halkada: gelen çerçeveler ödünç (ör. AudioRingBuffer görünümü) olabilir
+        self._preroll = np.zeros((max(self.start_frames, preroll_ms // frame_ms), self.frame_len), dtype=np.int16)
+        self._preroll_count = 0
+        self._rest = np.empty(0, dtype=np.int16)
+        self._voiced_run = 0
+        self._silent_run = 0
+        self._stats = {"frames": 0, "speech_frames": 0, "fed_frames": 0, "segments": 0, "vad_time": 0.0}
+
+    def levels(self, frames: np.ndarray) -> np.ndarray:
+        """RMS level of each frame (rows of int16 samples) in dBFS"""
+        x = frames.astype(np.float32) / 32768.0
+        return 10 * np.log10(np.mean(x * x, axis=1) + _EPS)
+
+    def process(self, block) -> Tuple[Optional[bytes], bool]:
+        """Returns (audio to recognize or None, speech_ended) for one block of int16 mono audio"""
+        start = time.perf_counter()
+        samples = np.frombuffer(block, dtype=np.int16)
+        if self._rest.size:
+            samples = np.concatenate((self._rest, samples))
+        n = samples.size // self.frame_len
+        frames = samples[:n * self.frame_len].reshape(n, self.frame_len)
+        self._rest = samples[n * self.frame_len:].copy()
+
+        out, ended = [], False
+        for frame, level in zip(frames, self.levels(frames).tolist() if n else ()):
+            voiced = level > max(self.threshold_db, self.noise_db + self.margin_db)
+            self._stats["frames"] += 1
+            if voiced:
+                self._stats["speech_frames"] += 1
+                self.lag_samples = 0
+            else:
+                self.lag_samples += self.frame_len
+                self.noise_db += NOISE_ALPHA * (level - self.noise_db)
+
+            if self.in_speech:
+                out.append(frame)
+                self._silent_run = 0 if voiced else self._silent_run + 1
+                if self._silent_run >= self.hangover_frames:
+                    self.in_speech, ended = False, True
+                    self._voiced_run = self._silent_run = 0
+                continue
+
+            self._preroll[self._preroll_count % len(self._preroll)] = frame
+            self._preroll_count += 1
+            self._voiced_run = self._voiced_run + 1 if voiced else 0
+            if self._voiced_run >= self.start_frames:
+                # Konuşma başladı: tetiklemeden önceki çerçeveler de gönderilir. Hemen kopyalanır:
+                # aynı blokta konuşma biterse sonraki sessiz çerçeveler bu satırların üstüne yazılır
+                self.in_speech = True
+                self._stats["segments"] += 1
+                out.append(np.concatenate(self._preroll_frames()))
+                self._preroll_count = 0
+                self._silent_run = 0
+
+        fed = np.concatenate(out) if out else None
+        self._stats["fed_frames"] += fed.size // self.frame_len if fed is not None else 0
+        self._stats["vad_time"] += time.perf_counter() - start
+        return (fed.tobytes() if fed is not None else None), ended
+
+    def _preroll_frames(self):
+        """Buffered pre-roll frames, oldest first"""
+        size = len(self._preroll)
+        count = min(self._preroll_count, size)
+        first = self._preroll_count - count
+        return [self._preroll[i % size] for i in range(first, self._preroll_count)]
+
+    @property
+    def trailing_silence(self) -> float:
+        """Seconds between the end of the last speech frame and the end of the audio seen so far"""
+        return (self.lag_samples + self._rest.size) / self.samplerate
+
+    def stats(self) -> Dict[str, Any]:
+        s = self._stats
+        frame_s = self.frame_len / self.samplerate
+        audio_s = s["frames"] * frame_s
+        return {
+            "in_speech": self.in_speech,
+            "noise_db": round(self.noise_db, 1),
+            "segments": s["segments"],
+            "audio_s": round(audio_s, 2),
+            "speech_s": round(s["speech_frames"] * frame_s, 2),
+            "fed_s": round(s["fed_frames"] * frame_s, 2),
+            "skipped_s": round((s["frames"] - s["fed_frames"]) * frame_s, 2),
+            "skipped_ratio": round(1 - s["fed_frames"] / s["frames"], 3) if s["frames"] else None,
+            "vad_ms_per_audio_s": round(s["vad_time"] * 1000 / audio_s, 3) if audio_s else None,
+        }
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import re
+from typing import Any, Awaitable, Callable, Dict, List
+
+from fast_path import parse_tool_result, DEFAULT_DB_PATH, DEFAULT_TABLE
+
+DEFAULT_GRAMMAR_INTERVAL = 30.0  # saniye: db_version bu sıklıkla kontrol edilir
+MAX_PAGE_SIZE = 500              # server.py'deki sayfa boyutu üst sınırı
+
+# fast_path / prompt_builder niyetlerinin Türkçe kelimeleri ve miktarlar için sayılar
+COMMAND_WORDS = [
+    "ekle", "sil", "güncelle", "değiştir", "göster", "listele", "oku", "yap", "olarak",
+    "stokta", "stok", "olan", "olmayan", "var", "yok", "biten", "bitmiş", "tükenen", "tükendi",
+    "kaç", "tane", "adet", "toplam", "azalan", "az", "kalan", "neler", "hangi", "ne", "kadar",
+    "tablo", "tablolar", "tabloları", "tablosu", "tablosunu", "malzeme", "malzemeler", "ürün", "ürünler",
+    "miktar", "miktarı", "miktarını", "yeni", "adı", "adını", "ve", "bir", "iki", "üç", "dört", "beş",
+    "altı", "yedi", "sekiz", "dokuz", "on", "yirmi", "otuz", "kırk", "elli", "altmış", "yetmiş",
+    "seksen", "doksan", "yüz", "bin", "sıfır",
+]
+UNKNOWN = "[unk]"  # gramer dışı kelimeler yanlış bir ürün adına zorlanmasın
+
+_NON_WORD_RE = re.compile(r"[^\w\s]", re.UNICODE)
+
+
+def tr_lower(text: str) -> str:
+    """Turkish-aware lowercase ("I" -> "ı", "İ" -> "i"); the Vosk vocabulary is lowercase"""
+    return text.replace("I", "ı").replace("İ", "i").lower()
+
+
+def item_phrase(name: str) -> str:
+    """An item_name as the recognizer would spell it: lowercase words, no punctuation"""
+    return " ".join(_NON_WORD_RE.sub(" ", tr_lower(name)).split())
+
+
+def build_grammar(item_names: List[str], command_words: List[str] = COMMAND_WORDS) -> List[str]:
+    """Vosk phrase list: the command words, every item name and [unk]"""
+    items = sorted({p for p in (item_phrase(n) for n in item_names if n) if p})
+    return list(dict.fromkeys(command_words + items + [UNKNOWN]))
+
+
+async def fetch_item_names(call_tool: Callable[..., Awaitable[Any]], db_path: str = DEFAULT_DB_PATH,
+                           table_name: str = DEFAULT_TABLE) -> List[str]:
+    """Every item_name in the table, streamed page by page through the MCP stream_table tool"""
+    names = []
+
+    async def on_chunk(progress, total, message):
+        # Her sayfa bir progress bildirimi olarak gelir; cevaptan önce hepsi işlenmiş olur
+        if message:
+            names.extend(row.get("item_name") for row in json.loads(message).get("rows", []))
+
+    args = {"db_path": db_path, "table_name": table_name, "columns": ["item_name"], "page_size": MAX_PAGE_SIZE}
+    result = parse_tool_result(await call_tool("stream_table", args, progress_callback=on_chunk))
+    if "error" in result:
+        raise RuntimeError(result["error"])
+    if result.get("count") != len(names):
+        raise RuntimeError(f"stream_table sent {result.get('count')} rows but {len(names)} arrived")
+    return names
+
+
+class GrammarUpdater:
+    """Keeps a VoskRecognizer's grammar in sync with the inventory
+
+    Polls the cheap db_version tool; only when the version changed are the
+    item names read again and, if the phrase list differs, the recognizer rebuilt.
+    """
+
+    def __init__(self, recognizer, call_tool: Callable[..., Awaitable[Any]], db_path: str = DEFAULT_DB_PATH,
+                 table_name: str = DEFAULT_TABLE, interval: float = DEFAULT_GRAMMAR_INTERVAL):
+        self.recognizer = recognizer
+        self.call_tool = call_tool
+        self.db_path = db_path
+        self.table_name = table_name
+        self.interval = interval
+        self._version = None
+        self._grammar = None
+        self._stats = {"checks": 0, "reloads": 0, "rebuilds": 0, "errors": 0, "items": 0, "phrases": 0}
+
+    async def refresh(self) -> bool:
+        """Rebuild the grammar if the db changed; returns True when the recognizer got a new grammar"""
+        self._stats["checks"] += 1
+        version = parse_tool_result(await self.call_tool("db_version", {"db_path": self.db_path})).get("version")
+        if version is not None and version == self._version:
+            return False
+        names = await fetch_item_names(self.call_tool, self.db_path, self.table_name)
+        self._stats["reloads"] += 1
+        self._version = version
+        grammar = build_grammar(names)
+        if grammar == self._grammar:
+            return False
+        self._grammar = grammar
+        self.recognizer.set_grammar(grammar)
+        self._stats["rebuilds"] += 1
+        self._stats["items"] = len(names)
+        self._stats["phrases"] = len(grammar)
+        print(f"🔤 Voice grammar: {len(grammar)} phrases ({len(names)} items from {self.table_name})")
+        return True
+
+    async def run(self):
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self._stats["errors"] += 1
+                print(f"⚠️ Could not refresh voice grammar: {e}")
+            await asyncio.sleep(self.interval)
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "version": self._version}
@@ -0,0 +1,161 @@
+"""
+Voice front end for the kitchen agent.
+
+Final utterances from VoskRecognizer.transcripts() are answered as they
+arrive: each one becomes its own task, so the recognizer keeps decoding the
+next utterance while the fast path or an agent works on the previous one.
+Latency is measured from the end of speech to the answer and kept per route
+(fast_path / cached / agent).
+
+In the client process (shares its agent pool and caches):
+    VOICE_INPUT=1 python client.py
+Standalone, against a running client (--mcp_url restricts recognition to
+the command words and the current item names, see voice_grammar.py):
+    python voice_query.py --url http://127.0.0.1:8080/query --mcp_url http://127.0.0.1:3002/sse
+"""
+import argparse
+import asyncio
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict
+
+from audio_ring import DEFAULT_MAX_LAG, DROP_OLDEST, POLICIES
+from call_stats import CallStats
+from fast_path import DEFAULT_DB_PATH, DEFAULT_TABLE
+from vad import DEFAULT_THRESHOLD_DB, DEFAULT_MARGIN_DB, DEFAULT_HANGOVER_MS, DEFAULT_PREROLL_MS
+from voice_grammar import GrammarUpdater, DEFAULT_GRAMMAR_INTERVAL
+
+DEFAULT_VOSK_MODEL = "vosk-model-small-tr-0.3"
+DEFAULT_MAX_PENDING = 4   # cevap bekleyen en fazla sesli komut
+MIN_UTTERANCE_CHARS = 2   # "a", "ı" gibi tek harfli gürültü sonuçları atlanır
+
+
+def route_of(result: Dict[str, Any]) -> str:
+    if "error" in result:
+        return "error"
+    if result.get("fast_path"):
+        return "fast_path"
+    if result.get("cached"):
+        return "cached"
+    return "agent"
+
+
+class VoicePipeline:
+    """Answers final transcripts concurrently through `answer(text) -> dict` (the /query result shape)"""
+
+    def __init__(self, answer: Callable[[str], Awaitable[Dict[str, Any]]], max_pending: int = DEFAULT_MAX_PENDING,
+                 show_partials: bool = True):
+        self.answer = answer
+        self.max_pending = max_pending
+        self.show_partials = show_partials
+        self.latency = CallStats()  # konuşma sonu -> cevap, yol başına
+        self._pending = set()
+        self._stats = {"utterances": 0, "answered": 0, "dropped": 0, "errors": 0}
+
+    async def run(self, transcripts: AsyncIterator[Any]):
+        try:
+            async for transcript in transcripts:
+                if not transcript.final:
+                    if self.show_partials:
+                        print("⌛", transcript.text, end="\r")
+                    continue
+                if len(transcript.text.strip()) < MIN_UTTERANCE_CHARS:
+                    continue
+                self._stats["utterances"] += 1
+                if len(self._pending) >= self.max_pending:
+                    # Cevaplar konuşmanın gerisinde kaldı: birikmesin, kullanıcı tekrar söyler
+                    self._stats["dropped"] += 1
+                    print(f"⚠️ {len(self._pending)} commands still pending, dropped: {transcript.text}")
+                    continue
+                print("🗣️", transcript.text)
+                task = asyncio.create_task(self._handle(transcript))
+                self._pending.add(task)
+                task.add_done_callback(self._pending.discard)
+        finally:
+            for task in list(self._pending):
+                task.cancel()
+
+    async def _handle(self, transcript):
+        try:
+            result = await self.answer(transcript.text)
+        except Exception as e:
+            result = {"error": str(e)}
+        done = time.monotonic()
+        route = route_of(result)
+        speech_end = transcript.speech_end if transcript.speech_end is not None else transcript.recognized_at
+        latency = done - speech_end
+        self.latency.record(route, latency, error=route == "error")
+        self._stats["errors" if route == "error" else "answered"] += 1
+        print(f"🤖 [{transcript.text}] {result.get('response', result.get('error'))}")
+        print(f"⏱️ speech end -> answer: {latency * 1000:.0f}ms "
+              f"(recognition {(transcript.recognized_at - speech_end) * 1000:.0f}ms, {route})")
+
+    def stats(self) -> Dict[str, Any]:
+        return {**self._stats, "pending": len(self._pending), "latency": self.latency.stats()}
+
+
+async def run_voice(pipeline: VoicePipeline, recognizer, grammar=None):
+    """Answer spoken commands; a GrammarUpdater keeps the recognizer's phrase list in sync meanwhile"""
+    updater = asyncio.create_task(grammar.run()) if grammar is not None else None
+    try:
+        await pipeline.run(recognizer.transcripts())
+    finally:
+        if updater is not None:
+            updater.cancel()
+
+
+async def main(args):
+    import httpx
+    from vosk_model import VoskRecognizer
+    from mcp_session import MCPSessionManager
+
+    vad = None
+    if not args.no_vad:
+        from vad import EnergyVAD
+        vad = EnergyVAD(args.samplerate, threshold_db=args.vad_threshold_db, margin_db=args.vad_margin_db,
+                        hangover_ms=args.vad_hangover_ms, preroll_ms=args.vad_preroll_ms)
+    recognizer = VoskRecognizer(args.model_path, args.samplerate, vad=vad, max_lag=args.max_lag,
+                                overrun_policy=args.overrun_policy)
+    mcp_client, grammar = None, None
+    if args.mcp_url:
+        mcp_client = MCPSessionManager(args.mcp_url)
+        await mcp_client.start()
+        grammar = GrammarUpdater(recognizer, mcp_client.call_tool, args.db_path, args.table_name, args.grammar_interval)
+
+    async with httpx.AsyncClient(timeout=300) as http:
+        async def answer(text: str) -> Dict[str, Any]:
+            r = await http.post(args.url, json={"query": text, "session_id": args.session_id})
+            return r.json()
+
+        pipeline = VoicePipeline(answer, args.max_pending)
+        try:
+            await run_voice(pipeline, recognizer, grammar)
+        finally:
+            print(f"\n📊 {pipeline.stats()}")
+            print(f"📊 {recognizer.stats()}")
+            if mcp_client is not None:
+                await mcp_client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send spoken commands to the kitchen agent's /query endpoint")
+    parser.add_argument("--url", type=str, default="http://127.0.0.1:8080/query")
+    parser.add_argument("--model_path", type=str, default=DEFAULT_VOSK_MODEL)
+    parser.add_argument("--samplerate", type=int, default=16000)
+    parser.add_argument("--max_pending", type=int, default=DEFAULT_MAX_PENDING, help="Commands answered at the same time")
+    parser.add_argument("--session_id", type=str, default=None, help="Keep conversation history across commands")
+    parser.add_argument("--mcp_url", type=str, default=None,
+                        help="MCP server (e.g. http://127.0.0.1:3002/sse) to build the recognizer grammar from the inventory")
+    parser.add_argument("--db_path", type=str, default=DEFAULT_DB_PATH)
+    parser.add_argument("--table_name", type=str, default=DEFAULT_TABLE)
+    parser.add_argument("--max_lag", type=float, default=DEFAULT_MAX_LAG, help="Seconds of audio buffered before the overrun policy drops some")
+    parser.add_argument("--overrun_policy", type=str, default=DROP_OLDEST, choices=POLICIES)
+    parser.add_argument("--no_vad", action="store_true", help="Feed silence to the recognizer too")
+    parser.add_argument("--vad_threshold_db", type=float, default=DEFAULT_THRESHOLD_DB, help="Frames quieter than this (dBFS) are always silence")
+    parser.add_argument("--vad_margin_db", type=float, default=DEFAULT_MARGIN_DB, help="Speech must be this far above the noise floor")
+    parser.add_argument("--vad_hangover_ms", type=int, default=DEFAULT_HANGOVER_MS, help="Silence after speech before the utterance is closed")
+    parser.add_argument("--vad_preroll_ms", type=int, default=DEFAULT_PREROLL_MS, help="Audio kept from before speech was detected")
+    parser.add_argument("--grammar_interval", type=float, default=DEFAULT_GRAMMAR_INTERVAL, help="Seconds between inventory change checks")
+    try:
+        asyncio.run(main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -1,36 +1,199 @@
+import asyncio
 import sounddevice as sd
-import queue
 import json
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional
 from vosk import Model, KaldiRecognizer
+from audio_ring import AudioRingBuffer, DEFAULT_MAX_LAG, DROP_OLDEST
+
+READ_TIMEOUT = 0.5  # saniye: ses gelmezse tanıyıcı iş parçacığı bu kadar sonra döner
+
+
+class Transcript:
+    """One recognizer result: a changing partial hypothesis or a finished utterance (final=True)
+
+    speech_end is the time.monotonic() at which the last word was spoken, so
+    `time.monotonic() - speech_end` is how long the user has been waiting.
+    """
+
+    def __init__(self, text: str, final: bool, speech_end: Optional[float] = None, recognized_at: float = None):
+        self.text = text
+        self.final = final
+        self.speech_end = speech_end
+        self.recognized_at = recognized_at if recognized_at is not None else time.monotonic()
+
+    def __repr__(self):
+        return f"Transcript({self.text!r}, final={self.final})"
 
 
 class VoskRecognizer:
-    def __init__(self, model_path: str, samplerate: int = 16000):
+    def __init__(self, model_path: str, samplerate: int = 16000, blocksize: int = 8000, grammar: List[str] = None,
+                 vad=None, max_lag: float = DEFAULT_MAX_LAG, overrun_policy: str = DROP_OLDEST):
         self.model = Model(model_path)
-        self.recognizer = KaldiRecognizer(self.model, samplerate)
-        self.q = queue.Queue()
         self.samplerate = samplerate
+        self.blocksize = blocksize
+        self.grammar = grammar
+        # Verilirse (vad.EnergyVAD) sessizlik tanıyıcıya hiç gitmez
+        self.vad = vad
+        self._vad_lag = None
+        self._accept_time = 0.0
+        self._fed_total = 0
+        self.recognizer = self._make_recognizer(grammar)
+        # Ses geri çağrısı ile tanıyıcı arasında sabit boyutlu tampon: en fazla max_lag saniye geride kalınır
+        self.ring = AudioRingBuffer(samplerate, max_lag, overrun_policy, blocksize)
+        self.grammar_updates = 0
+        self._pending_grammar = None
+        self._in_utterance = False
+        self._fed = 0       # tanıyıcıya verilen toplam örnek sayısı
+        self._fed_base = 0  # şu anki tanıyıcı oluşturulduğunda verilmiş örnek sayısı
+
+    def _make_recognizer(self, grammar: List[str] = None):
+        if grammar:
+            # Sadece bu ifadeler aranır: daha küçük arama grafiği, ürün adlarında daha az hata
+            recognizer = KaldiRecognizer(self.model, self.samplerate, json.dumps(grammar, ensure_ascii=False))
+        else:
+            recognizer = KaldiRecognizer(self.model, self.samplerate)
+        # Kelime zamanları: konuşmanın bittiği an buradan hesaplanır
+        recognizer.SetWords(True)
+        return recognizer
+
+    def set_grammar(self, grammar: Optional[List[str]]):
+        """Restrict recognition to these phrases (None: full vocabulary); applied between utterances"""
+        self._pending_grammar = (grammar,)
+
+    def _apply_grammar(self):
+        grammar, = self._pending_grammar
+        self._pending_grammar = None
+        self.recognizer = self._make_recognizer(grammar)
+        self.grammar = grammar
+        self._fed_base = self._fed
+        self.grammar_updates += 1
 
     def _callback(self, indata, frames, time, status):
         if status:
             print(status)
-        self.q.put(bytes(indata))
+        self.ring.write(indata)
 
     def listen(self):
         print("🎙️ Dinleniyor (Ctrl+C ile çık)")
-        with sd.RawInputStream(samplerate=self.samplerate, blocksize=8000,
+        with sd.RawInputStream(samplerate=self.samplerate, blocksize=self.blocksize,
                                dtype='int16', channels=1, callback=self._callback):
             while True:
-                data = self.q.get()
-                if self.recognizer.AcceptWaveform(data):
-                    result = json.loads(self.recognizer.Result())
+                block = self._next_block()
+                if block is None:
+                    continue
+                final, result, _ = block
+                if final:
                     text = result.get("text", "")
                     if text:
                         print("🗣️", text)
-                else:
-                    partial = json.loads(self.recognizer.PartialResult())
-                    if partial.get("partial"):
-                        print("⌛", partial["partial"], end="\r")
+                elif result.get("partial"):
+                    print("⌛", result["partial"], end="\r")
+
+    def _accept(self, data: bytes):
+        """Feed one block; returns (final, parsed result). Runs on the recognizer thread"""
+        if self._pending_grammar is not None and not self._in_utterance:
+            # Tanıyıcı sadece bu iş parçacığında değişir; yarım kalan bir cümle kaybolmaz
+            self._apply_grammar()
+        ended = False
+        if self.vad is not None:
+            data, ended = self.vad.process(data)
+            self._vad_lag = self.vad.trailing_silence if ended else None
+            if data is None and not ended:
+                return False, {"partial": ""}
+
+        start = time.perf_counter()
+        try:
+            if data and not isinstance(data, bytes):
+                # cffi char* sadece bytes kabul ediyor: tek kopya burada, VAD varken sadece konuşma için
+                data = bytes(data)
+            if data:
+                self._fed += len(data) // 2  # int16 mono
+                self._fed_total += len(data) // 2
+                if self.recognizer.AcceptWaveform(data):
+                    self._in_utterance = False
+                    return True, json.loads(self.recognizer.Result())
+            if ended:
+                # VAD konuşmanın bittiğini gördü: Kaldi'nin kendi sessizlik beklemesine gerek yok
+                self._in_utterance = False
+                return True, json.loads(self.recognizer.FinalResult())
+            result = json.loads(self.recognizer.PartialResult())
+            self._in_utterance = bool(result.get("partial"))
+            return False, result
+        finally:
+            self._accept_time += time.perf_counter() - start
+
+    def _next_block(self, timeout: float = READ_TIMEOUT):
+        """Recognize the next buffered block in place: (final, result, speech_end) or None if no audio came"""
+        with self.ring.read(self.blocksize, timeout) as (data, captured_at):
+            if not len(data):
+                return None
+            final, result = self._accept(data)
+        return final, result, self._speech_end(result, captured_at) if final else None
+
+    def _speech_end(self, result: dict, captured_at: float) -> float:
+        """Wall time of the last word: the block arrived at captured_at, the word ended (stream end - word end) earlier"""
+        if self._vad_lag is not None:
+            return captured_at - self._vad_lag
+        words = result.get("result")
+        if not words:
+            return captured_at
+        # Kelime zamanları tanıyıcının oluşturulduğu andan itibaren sayılır
+        trailing = (self._fed - self._fed_base) / self.samplerate - words[-1]["end"]
+        return captured_at - max(0.0, trailing)
+
+    def stats(self) -> Dict[str, Any]:
+        """Recognizer load; with a VAD also the audio it skipped and the recognizer time that saved"""
+        fed_s = self._fed_total / self.samplerate
+        result = {
+            "fed_s": round(fed_s, 2),
+            "recognizer_s": round(self._accept_time, 3),
+            "recognizer_rtf": round(self._accept_time / fed_s, 4) if fed_s else None,
+            "grammar_phrases": len(self.grammar) if self.grammar else None,
+            "grammar_updates": self.grammar_updates,
+            "ring": self.ring.stats(),
+        }
+        if self.vad is not None:
+            vad = self.vad.stats()
+            result["vad"] = vad
+            # Atlanan ses, tanıyıcıya verilen sesle aynı maliyette işlenecekti
+            if fed_s:
+                result["cpu_saved_s"] = round(vad["skipped_s"] * self._accept_time / fed_s, 3)
+        return result
+
+    async def transcripts(self, partials: bool = True) -> AsyncIterator[Transcript]:
+        """Async generator of Transcripts from the microphone
+
+        The audio callback writes into the ring buffer and recognition runs on a
+        separate thread, so the loop stays free for whatever consumes the results
+        (agent calls, HTTP requests) while the next utterance is being decoded.
+        """
+        loop = asyncio.get_running_loop()
+        # KaldiRecognizer thread-safe değil: bütün bloklar aynı tek iş parçacığında sırayla işlenir
+        executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="vosk")
+        last_partial = ""
+        try:
+            with sd.RawInputStream(samplerate=self.samplerate, blocksize=self.blocksize,
+                                   dtype='int16', channels=1, callback=self._callback):
+                print("🎙️ Dinleniyor (Ctrl+C ile çık)")
+                while True:
+                    block = await loop.run_in_executor(executor, self._next_block)
+                    if block is None:
+                        continue
+                    final, result, speech_end = block
+                    if final:
+                        last_partial = ""
+                        text = result.get("text", "")
+                        if text:
+                            yield Transcript(text, True, speech_end)
+                    elif partials:
+                        text = result.get("partial", "")
+                        if text and text != last_partial:
+                            last_partial = text
+                            yield Transcript(text, False)
+        finally:
+            executor.shutdown(wait=False)
 
 if __name__ == "__main__":
     model_path = "vosk-model-small-tr-0.3"